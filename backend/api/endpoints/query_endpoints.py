@@ -2,6 +2,7 @@
 Query Processing API Endpoints
 RESTful API endpoints for query processing and results
 """
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends, Query as FastAPIQuery
@@ -143,8 +144,9 @@ async def process_query(request: QueryRequest):
         
         hybrid_processor = get_hybrid_query_processor_dependency()
         
-        # Process hybrid query
-        result = hybrid_processor.process_hybrid_query(
+        # Process hybrid query off the event loop so concurrent requests are not serialized
+        result = await asyncio.to_thread(
+            hybrid_processor.process_hybrid_query,
             query=request.query,
             user_context=request.user_context
         )
@@ -215,7 +217,8 @@ async def generate_sql(request: SQLGenerationRequest):
         logger.info(f"Generating SQL for query: {request.query[:100]}...")
         
         sql_generator = get_sql_generator_dependency()
-        sql_result = sql_generator.generate_sql(
+        sql_result = await asyncio.to_thread(
+            sql_generator.generate_sql,
             query=request.query,
             schema_info=request.schema_info,
             user_context=request.user_context
@@ -4,9 +4,11 @@ RESTful API endpoints for schema discovery and natural language mapping
 """
 import logging
 from typing import Dict, List, Any, Optional
-from fastapi import APIRouter, HTTPException, Depends, Query, Body
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Query, Body, Response
 from pydantic import BaseModel, Field
 from ..services.schema_service import get_schema_service, initialize_schema_service
+from ..services.database_utils import connection_tag
 from ..services.database_manager import get_database_manager
 
 logger = logging.getLogger(__name__)
@@ -93,13 +95,13 @@ async def discover_schema(request: DatabaseConnectionRequest):
     - Schema caching and optimization
     """
     try:
-        logger.info(f"Schema discovery requested for connection: {request.connection_string[:50]}...")
+        logger.info(f"Schema discovery requested for connection: {connection_tag(request.connection_string)}")
         
         schema_service = get_schema_service_dependency()
-        schema_data = schema_service.discover_schema(
-            connection_string=request.connection_string,
-            force_refresh=request.force_refresh
-        )
+        if request.force_refresh:
+            schema_data = schema_service.refresh_schema(request.connection_string)
+        else:
+            schema_data = schema_service.get_schema_info(request.connection_string)
         
         logger.info(f"Schema discovery completed for {schema_data.get('summary', {}).get('total_tables', 0)} tables")
         
@@ -191,7 +193,7 @@ async def validate_schema(request: SchemaValidationRequest):
     - Performance recommendations
     """
     try:
-        logger.info(f"Schema validation requested for connection: {request.connection_string[:50]}...")
+        logger.info(f"Schema validation requested for connection: {connection_tag(request.connection_string)}")
         
         schema_service = get_schema_service_dependency()
         validation_result = schema_service.validate_schema(
@@ -225,7 +227,7 @@ async def get_schema_statistics(
     - Schema complexity analysis
     """
     try:
-        logger.info(f"Schema statistics requested for connection: {connection_string[:50]}...")
+        logger.info(f"Schema statistics requested for connection: {connection_tag(connection_string)}")
         
         schema_service = get_schema_service_dependency()
         statistics = schema_service.get_schema_statistics(
@@ -257,7 +259,7 @@ async def get_schema_summary(
     - Quick analysis
     """
     try:
-        logger.info(f"Schema summary requested for connection: {connection_string[:50]}...")
+        logger.info(f"Schema summary requested for connection: {connection_tag(connection_string)}")
         
         schema_service = get_schema_service_dependency()
         summary = schema_service.get_schema_summary(
@@ -290,7 +292,7 @@ async def get_visualization_data(
     - Purpose indicators
     """
     try:
-        logger.info(f"Visualization data requested for connection: {connection_string[:50]}...")
+        logger.info(f"Visualization data requested for connection: {connection_tag(connection_string)}")
         
         schema_service = get_schema_service_dependency()
         visualization_data = schema_service.get_schema_visualization_data(
@@ -299,10 +301,20 @@ async def get_visualization_data(
         
         logger.info("Visualization data retrieved successfully")
         
-        return VisualizationDataResponse(
-            success=True,
-            visualization_data=visualization_data,
-            timestamp=schema_service._get_timestamp()
+        # Serialize the (potentially large) payload once with orjson instead of
+        # re-validating it through the response model and jsonable_encoder
+        return Response(
+            content=orjson.dumps(
+                {
+                    "success": True,
+                    "visualization_data": visualization_data,
+                    "error": None,
+                    "timestamp": schema_service._get_timestamp()
+                },
+                default=str,
+                option=orjson.OPT_NON_STR_KEYS
+            ),
+            media_type="application/json"
         )
         
     except Exception as e:
@@ -42,7 +42,11 @@ class DatabaseInitializer:
             
             # Initialize Redis service
             self.logger.info("Initializing Redis service...")
-            redis_service = initialize_redis_service(settings.REDIS_URL)
+            redis_service = initialize_redis_service(
+                settings.REDIS_URL,
+                pool_size=settings.REDIS_POOL_SIZE,
+                pool_timeout=settings.REDIS_POOL_TIMEOUT
+            )
             self.services["redis"] = redis_service
             
             # Initialize Database Utils service
@@ -151,7 +155,11 @@ class DatabaseInitializer:
             if "postgresql" in self.services:
                 self.services["postgresql"].close()
             
-            # Redis and ChromaDB connections are managed by their clients
+            # Release pooled Redis connections
+            if "redis" in self.services:
+                self.services["redis"].shutdown()
+            
+            # ChromaDB connections are managed by its client
             # No explicit close needed
             
             self.initialized = False
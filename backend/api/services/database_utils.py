@@ -4,6 +4,7 @@ Common database operations, validation, and helper functions
 """
 import logging
 import hashlib
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Union
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
@@ -18,6 +19,20 @@ from ..models.database_models import (
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=4096)
+def _query_hash(query_text: str, query_type: str) -> str:
+    """MD5 of a typed query, memoized since most queries repeat"""
+    return hashlib.md5(f"{query_type}:{query_text}".encode()).hexdigest()
+
+@lru_cache(maxsize=128)
+def connection_hash(connection_string: str) -> str:
+    """SHA-256 of a connection string, memoized since only a few distinct ones are in use"""
+    return hashlib.sha256(connection_string.encode()).hexdigest()
+
+def connection_tag(connection_string: str) -> str:
+    """Short connection hash for log messages, so connection strings and credentials stay out of logs"""
+    return connection_hash(connection_string)[:8]
+
 class DatabaseUtils:
     """Utility functions for common database operations"""
     
@@ -37,8 +52,7 @@ class DatabaseUtils:
         Returns:
             Query hash string
         """
-        query_string = f"{query_type}:{query_text}"
-        return hashlib.md5(query_string.encode()).hexdigest()
+        return _query_hash(query_text, query_type)
     
     def generate_connection_hash(self, connection_string: str) -> str:
         """
@@ -50,7 +64,7 @@ class DatabaseUtils:
         Returns:
             Connection hash string
         """
-        return hashlib.sha256(connection_string.encode()).hexdigest()
+        return connection_hash(connection_string)
     
     def log_query(
         self, 
@@ -3,12 +3,14 @@ Multi-Format Document Processing Pipeline
 Handles PDF, DOCX, TXT, and CSV files with intelligent processing
 """
 import logging
+import threading
 import os
 import mimetypes
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import hashlib
 import json
+from functools import lru_cache
 from pathlib import Path
 
 # Document processing libraries
@@ -20,9 +22,9 @@ import chardet
 
 # Text processing
 import re
-from sentence_transformers import SentenceTransformer
 
 # Database and storage
+from config import settings
 from .chromadb_service import get_chromadb_service
 from .database_manager import get_database_manager
 from .database_utils import get_database_utils
@@ -30,6 +32,29 @@ from .mistral_client import get_mistral_client
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=4)
+def load_embedding_model(model_name: str):
+    """
+    Load a sentence-transformers model once per process
+    
+    torch and sentence-transformers are only imported here, so importing this
+    module (and the app) doesn't pay several seconds for them. The model is
+    warmed up with a one-sentence encode so the first real request doesn't
+    pay for lazy tokenizer and Torch initialization. On CPU, the transformer's
+    Linear layers are dynamically quantized to int8 when EMBEDDING_QUANTIZE
+    is enabled.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    
+    model = SentenceTransformer(model_name)
+    if settings.EMBEDDING_QUANTIZE and model.device.type == "cpu":
+        model[0].auto_model = torch.ao.quantization.quantize_dynamic(
+            model[0].auto_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    model.encode(["warmup"])
+    return model
+
 class DocumentProcessor:
     """Multi-format document processing with intelligent chunking"""
     
@@ -107,14 +132,14 @@ class DocumentProcessor:
             # Initialize embedding model
             self.logger.info("Loading sentence-transformers model...")
             try:
-                self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+                self.embedding_model = load_embedding_model('all-MiniLM-L6-v2')
                 self.logger.info("Embedding model loaded successfully")
             except Exception as e:
                 self.logger.error(f"Failed to load embedding model: {str(e)}")
                 # Try alternative model
                 try:
                     self.logger.info("Trying alternative embedding model...")
-                    self.embedding_model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
+                    self.embedding_model = load_embedding_model('paraphrase-MiniLM-L6-v2')
                     self.logger.info("Alternative embedding model loaded successfully")
                 except Exception as e2:
                     self.logger.error(f"Failed to load alternative embedding model: {str(e2)}")
@@ -246,14 +271,14 @@ class DocumentProcessor:
             if not self.embedding_model:
                 self.logger.warning("Embedding model not initialized, attempting lazy initialization...")
                 try:
-                    self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+                    self.embedding_model = load_embedding_model('all-MiniLM-L6-v2')
                     self.logger.info("Embedding model loaded successfully (lazy initialization)")
                 except Exception as e:
                     self.logger.error(f"Failed to load embedding model: {str(e)}")
                     # Try alternative model
                     try:
                         self.logger.info("Trying alternative embedding model...")
-                        self.embedding_model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
+                        self.embedding_model = load_embedding_model('paraphrase-MiniLM-L6-v2')
                         self.logger.info("Alternative embedding model loaded successfully (lazy initialization)")
                     except Exception as e2:
                         self.logger.error(f"Failed to load alternative embedding model: {str(e2)}")
@@ -827,15 +852,14 @@ class DocumentProcessor:
                 self.logger.warning("No valid text chunks found for embedding generation")
                 return []
             
-            # Generate embeddings in batches
-            batch_size = 32
-            embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch_texts = texts[i:i + batch_size]
-                if batch_texts:  # Ensure batch is not empty
-                    batch_embeddings = self.embedding_model.encode(batch_texts)
-                    embeddings.extend(batch_embeddings.tolist())
+            # Generate all embeddings in one call; the model batches the
+            # forward passes internally
+            embeddings = self.embedding_model.encode(
+                texts,
+                batch_size=64,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            ).tolist()
             
             self.logger.info(f"Generated {len(embeddings)} embeddings")
             return embeddings
@@ -1069,6 +1093,7 @@ class DocumentProcessor:
 
 # Global document processor instance
 document_processor: Optional[DocumentProcessor] = None
+_document_processor_lock = threading.Lock()
 
 def get_document_processor() -> DocumentProcessor:
     """Get the global document processor instance"""
@@ -1077,22 +1102,27 @@ def get_document_processor() -> DocumentProcessor:
     return document_processor
 
 def initialize_document_processor() -> DocumentProcessor:
-    """Initialize the global document processor"""
+    """Initialize the global document processor, or return it if it already is"""
     global document_processor
-    document_processor = DocumentProcessor()
-    document_processor.initialize()
+    # Startup and a first request may race to initialize; only one loads the model
+    with _document_processor_lock:
+        if document_processor is None:
+            processor = DocumentProcessor()
+            processor.initialize()
+            document_processor = processor
     return document_processor
 
 def get_or_initialize_document_processor() -> DocumentProcessor:
     """Get or initialize the global document processor with lazy initialization"""
     global document_processor
-    if document_processor is None:
-        logger.info("Document processor not initialized, creating new instance...")
-        document_processor = DocumentProcessor()
-        try:
-            document_processor.initialize()
-            logger.info("Document processor initialized successfully")
-        except Exception as e:
-            logger.warning(f"Document processor initialization failed: {str(e)}")
-            logger.info("Document processor will use lazy initialization")
+    with _document_processor_lock:
+        if document_processor is None:
+            logger.info("Document processor not initialized, creating new instance...")
+            document_processor = DocumentProcessor()
+            try:
+                document_processor.initialize()
+                logger.info("Document processor initialized successfully")
+            except Exception as e:
+                logger.warning(f"Document processor initialization failed: {str(e)}")
+                logger.info("Document processor will use lazy initialization")
     return document_processor
\ No newline at end of file
@@ -3,6 +3,7 @@ Document Search Engine
 Vector-based document search using ChromaDB and embeddings
 """
 import logging
+import threading
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
@@ -496,6 +497,7 @@ class DocumentSearchEngine:
 
 # Global document search engine instance
 document_search_engine: Optional[DocumentSearchEngine] = None
+_document_search_engine_lock = threading.Lock()
 
 def get_document_search_engine() -> DocumentSearchEngine:
     """Get the global document search engine instance"""
@@ -504,8 +506,12 @@ def get_document_search_engine() -> DocumentSearchEngine:
     return document_search_engine
 
 def initialize_document_search_engine() -> DocumentSearchEngine:
-    """Initialize the global document search engine"""
+    """Initialize the global document search engine, or return it if it already is"""
     global document_search_engine
-    document_search_engine = DocumentSearchEngine()
-    document_search_engine.initialize()
+    # Startup and a first request may race to initialize; only one does
+    with _document_search_engine_lock:
+        if document_search_engine is None:
+            engine = DocumentSearchEngine()
+            engine.initialize()
+            document_search_engine = engine
     return document_search_engine
@@ -4,11 +4,16 @@ Uses Mistral LLM for intelligent mapping without hard-coded patterns
 """
 import logging
 import json
+import re
 from typing import Dict, List, Any, Optional, Tuple
 from .mistral_client import MistralClient
 
 logger = logging.getLogger(__name__)
 
+# Minimum SequenceMatcher ratio for a column to count as similar to a term
+_COLUMN_SIMILARITY_THRESHOLD = 0.3
+_KEYWORD_RE = re.compile(r'\b\w+\b')
+
 class DynamicNaturalLanguageMapper:
     """Truly dynamic natural language to schema mapping using Mistral LLM"""
     
@@ -425,11 +430,10 @@ class DynamicNaturalLanguageMapper:
     # Fallback methods for when LLM is unavailable
     def _fallback_entity_extraction(self, query: str) -> Dict[str, List[str]]:
         """Fallback entity extraction when LLM is unavailable"""
-        import re
         query_lower = query.lower()
         
         return {
-            "keywords": re.findall(r'\b\w+\b', query_lower),
+            "keywords": _KEYWORD_RE.findall(query_lower),
             "entities": [],
             "intent": "unknown",
             "filters": [],
@@ -507,12 +511,49 @@ class DynamicNaturalLanguageMapper:
     def find_similar_columns(self, term: str, schema: Dict[str, Any], limit: int = 10) -> List[Tuple[str, str, float]]:
         """Find columns similar to a natural language term using LLM"""
         try:
-            # Create prompt for column similarity
-            prompt = f"""
+            schema_json = self._column_listing_json(schema)
+            similar_columns = self._find_similar_columns_with_llm(term, schema_json, limit)
+            if similar_columns is not None:
+                return similar_columns
+            
+            # Fallback to simple similarity
+            return self._fallback_column_similarity(term, schema, limit)
+            
+        except Exception as e:
+            self.logger.error(f"LLM column similarity failed: {str(e)}")
+            return self._fallback_column_similarity(term, schema, limit)
+    
+    def find_similar_columns_indexed(
+        self,
+        term: str,
+        index: Dict[str, Any],
+        limit: int = 10
+    ) -> List[Tuple[str, str, float]]:
+        """Find columns similar to a term using a prebuilt column index (see build_column_index)"""
+        try:
+            similar_columns = self._find_similar_columns_with_llm(term, index["schema_json"], limit)
+            if similar_columns is not None:
+                return similar_columns
+            
+            # Fallback to simple similarity over the indexed columns
+            return self._indexed_column_similarity(term, index, limit)
+            
+        except Exception as e:
+            self.logger.error(f"LLM column similarity failed: {str(e)}")
+            return self._indexed_column_similarity(term, index, limit)
+    
+    def _column_listing_json(self, schema: Dict[str, Any]) -> str:
+        """Render the table -> column names listing used in column similarity prompts"""
+        return json.dumps({name: list(data.get("columns", {}).keys()) for name, data in schema.get("tables", {}).items()}, indent=2)
+    
+    def _find_similar_columns_with_llm(self, term: str, schema_json: str, limit: int) -> Optional[List[Tuple[str, str, float]]]:
+        """Ask the LLM for similar columns, returning None when no usable answer comes back"""
+        # Create prompt for column similarity
+        prompt = f"""
             Find database columns that are similar to this term. Be intelligent and adaptive.
             
             Search Term: "{term}"
-            Available Schema: {json.dumps({name: list(data.get("columns", {}).keys()) for name, data in schema.get("tables", {}).items()}, indent=2)}
+            Available Schema: {schema_json}
             
             Return JSON with:
             1. similar_columns: List of similar columns
@@ -524,41 +565,36 @@ class DynamicNaturalLanguageMapper:
             
             Be intelligent and look for logical connections, not just keyword matches.
             """
-            
-            # Get LLM analysis
-            llm_response = self.mistral_client.chat_completion(
-                messages=[{"role": "user", "content": prompt}],
-                model="mistral-small-latest"
-            )
-            
-            if llm_response.get("success"):
-                try:
-                    content = llm_response.get("content", "{}")
-                    json_start = content.find('{')
-                    json_end = content.rfind('}') + 1
-                    if json_start != -1 and json_end != -1:
-                        json_content = content[json_start:json_end]
-                        analysis = json.loads(json_content)
-                        
-                        similar_columns = []
-                        for col_info in analysis.get("similar_columns", []):
-                            similar_columns.append((
-                                col_info.get("table_name", ""),
-                                col_info.get("column_name", ""),
-                                float(col_info.get("similarity_score", 0.0))
-                            ))
-                        
-                        return similar_columns[:limit]
-                        
-                except Exception as e:
-                    self.logger.warning(f"Failed to parse column similarity LLM response: {str(e)}")
-            
-            # Fallback to simple similarity
-            return self._fallback_column_similarity(term, schema, limit)
-            
-        except Exception as e:
-            self.logger.error(f"LLM column similarity failed: {str(e)}")
-            return self._fallback_column_similarity(term, schema, limit)
+        
+        # Get LLM analysis
+        llm_response = self.mistral_client.chat_completion(
+            messages=[{"role": "user", "content": prompt}],
+            model="mistral-small-latest"
+        )
+        
+        if llm_response.get("success"):
+            try:
+                content = llm_response.get("content", "{}")
+                json_start = content.find('{')
+                json_end = content.rfind('}') + 1
+                if json_start != -1 and json_end != -1:
+                    json_content = content[json_start:json_end]
+                    analysis = json.loads(json_content)
+                    
+                    similar_columns = []
+                    for col_info in analysis.get("similar_columns", []):
+                        similar_columns.append((
+                            col_info.get("table_name", ""),
+                            col_info.get("column_name", ""),
+                            float(col_info.get("similarity_score", 0.0))
+                        ))
+                    
+                    return similar_columns[:limit]
+                    
+            except Exception as e:
+                self.logger.warning(f"Failed to parse column similarity LLM response: {str(e)}")
+        
+        return None
     
     def _fallback_column_similarity(self, term: str, schema: Dict[str, Any], limit: int) -> List[Tuple[str, str, float]]:
         """Fallback column similarity when LLM is unavailable"""
@@ -578,6 +614,73 @@ class DynamicNaturalLanguageMapper:
         similar_columns.sort(key=lambda x: x[2], reverse=True)
         return similar_columns[:limit]
     
+    def build_column_index(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Precompute the per-schema data used by column similarity searches
+        
+        Args:
+            schema: Discovered database schema
+            
+        Returns:
+            Index with the flattened (table, column, lowercased column) list,
+            column positions bucketed by name length, and the rendered column
+            listing for the LLM prompt
+        """
+        columns = []
+        by_length = {}
+        for table_name, table_info in schema.get("tables", {}).items():
+            for col_name in table_info.get("columns", {}):
+                col_lower = col_name.lower()
+                by_length.setdefault(len(col_lower), []).append(len(columns))
+                columns.append((table_name, col_name, col_lower))
+        
+        return {
+            "columns": columns,
+            "by_length": by_length,
+            "schema_json": self._column_listing_json(schema)
+        }
+    
+    def _indexed_column_similarity(self, term: str, index: Dict[str, Any], limit: int) -> List[Tuple[str, str, float]]:
+        """Fallback column similarity over a prebuilt column index"""
+        term_lower = term.lower()
+        term_length = len(term_lower)
+        
+        # ratio() is 2 * matches / total length, so it can never exceed
+        # 2 * min(len) / total length; skip buckets that cannot reach the threshold
+        positions = []
+        for length, bucket in index["by_length"].items():
+            total = term_length + length
+            if total == 0 or 2.0 * min(term_length, length) / total > _COLUMN_SIMILARITY_THRESHOLD:
+                positions.extend(bucket)
+        
+        # Keep schema order so ties rank the same as a full scan
+        positions.sort()
+        columns = index["columns"]
+        return self.score_columns(term_lower, [columns[position] for position in positions], limit)
+    
+    def score_columns(
+        self,
+        term: str,
+        candidates: List[Tuple[str, str, str]],
+        limit: int
+    ) -> List[Tuple[str, str, float]]:
+        """Score (table, column, lowercased column) candidates against a lowercased term"""
+        from difflib import SequenceMatcher
+        
+        similar_columns = []
+        matcher = SequenceMatcher(None, term)
+        for table_name, col_name, col_lower in candidates:
+            matcher.set_seq2(col_lower)
+            # quick_ratio() is a cheap upper bound on ratio()
+            if matcher.quick_ratio() <= _COLUMN_SIMILARITY_THRESHOLD:
+                continue
+            similarity = matcher.ratio()
+            if similarity > _COLUMN_SIMILARITY_THRESHOLD:
+                similar_columns.append((table_name, col_name, similarity))
+        
+        similar_columns.sort(key=lambda x: x[2], reverse=True)
+        return similar_columns[:limit]
+    
     # Wrapper methods for backward compatibility with tests
     def extract_entities(self, query: str, schema: Dict[str, Any]) -> Dict[str, List[str]]:
         """Wrapper for _extract_entities_with_llm (backward compatibility)"""
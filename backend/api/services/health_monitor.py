@@ -296,8 +296,8 @@ class HealthMonitor:
                 "timestamp": datetime.utcnow().isoformat()
             }]
     
-    def get_health_history(self, hours: int = 24) -> List[Dict[str, Any]]:
-        """Get health monitoring history"""
+    def get_health_history(self, hours: int = 24, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get health monitoring history, optionally a window of offset/limit metrics"""
         try:
             # Filter metrics from the last N hours
             cutoff_time = datetime.utcnow() - timedelta(hours=hours)
@@ -306,6 +306,10 @@ class HealthMonitor:
                 if metric.timestamp > cutoff_time
             ]
             
+            # Only the requested window is converted and serialized
+            end = None if limit is None else offset + limit
+            recent_metrics = recent_metrics[offset:end]
+            
             return [
                 {
                     "name": metric.name,
@@ -3,6 +3,7 @@ Hybrid Query Processing
 Combine SQL and document search results intelligently
 """
 import logging
+import threading
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
@@ -546,6 +547,7 @@ class HybridQueryProcessor:
 
 # Global hybrid query processor instance
 hybrid_query_processor: Optional[HybridQueryProcessor] = None
+_hybrid_query_processor_lock = threading.Lock()
 
 def get_hybrid_query_processor() -> HybridQueryProcessor:
     """Get the global hybrid query processor instance"""
@@ -554,8 +556,12 @@ def get_hybrid_query_processor() -> HybridQueryProcessor:
     return hybrid_query_processor
 
 def initialize_hybrid_query_processor() -> HybridQueryProcessor:
-    """Initialize the global hybrid query processor"""
+    """Initialize the global hybrid query processor, or return it if it already is"""
     global hybrid_query_processor
-    hybrid_query_processor = HybridQueryProcessor()
-    hybrid_query_processor.initialize()
+    # Startup and a first request may race to initialize; only one does
+    with _hybrid_query_processor_lock:
+        if hybrid_query_processor is None:
+            processor = HybridQueryProcessor()
+            processor.initialize()
+            hybrid_query_processor = processor
     return hybrid_query_processor
@@ -4,6 +4,8 @@ Handles communication with Mistral API for natural language processing
 """
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from mistralai import Mistral
 from dotenv import load_dotenv
@@ -440,6 +442,35 @@ class MistralClient:
                 "extracted_text": ""
             }
     
+    def extract_text_from_image_ocr_batch(
+        self,
+        image_path: str,
+        models: List[str],
+        **ocr_options: Any
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run OCR on the same image with several models concurrently
+        
+        Args:
+            image_path: Path to the image file
+            models: OCR models to run the image through
+            **ocr_options: Extra arguments passed to extract_text_from_image_ocr
+            
+        Returns:
+            OCR results keyed by model, in the order the models were given
+        """
+        if not models:
+            return {}
+        
+        # The requests are I/O bound, so overlap them instead of paying one
+        # round trip per model
+        with ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="mistral-ocr") as executor:
+            futures = {
+                model: executor.submit(self.extract_text_from_image_ocr, image_path, model=model, **ocr_options)
+                for model in models
+            }
+            return {model: future.result() for model, future in futures.items()}
+    
     def extract_text_from_url_ocr(
         self,
         url: str,
@@ -605,6 +636,7 @@ class MistralClient:
 
 # Global instance for easy access
 _mistral_client = None
+_mistral_client_lock = threading.Lock()
 
 def get_mistral_client() -> MistralClient:
     """
@@ -615,5 +647,8 @@ def get_mistral_client() -> MistralClient:
     """
     global _mistral_client
     if _mistral_client is None:
-        _mistral_client = MistralClient()
+        # Services may be initialized concurrently; create a single client
+        with _mistral_client_lock:
+            if _mistral_client is None:
+                _mistral_client = MistralClient()
     return _mistral_client
@@ -2,18 +2,221 @@
 Query Classification System
 Intelligent query classification using Mistral API for query type detection
 """
+import hashlib
 import logging
 import re
+import threading
+import time
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
 
+import msgpack
+import orjson
+import zstandard
+
 from .mistral_client import get_mistral_client
 from .database_utils import get_database_utils
 from .redis_service import get_redis_service
 
 logger = logging.getLogger(__name__)
 
+# Cached classifications are stored as zstd-compressed msgpack; the key
+# prefix is versioned so older JSON entries are never decoded
+_CLASSIFICATION_CACHE_PREFIX = "query_classification:v2"
+_CLASSIFICATION_HITS_KEY = "query_classification:stats:hits"
+_CLASSIFICATION_MISSES_KEY = "query_classification:stats:misses"
+
+# Cache hits and misses are counted in process and added to the shared
+# counters above at most this often, in seconds
+_STATS_FLUSH_INTERVAL = 10.0
+
+# Cache TTLs in seconds; unknown or low-confidence results (including
+# failures) expire quickly so repeated bad input does not re-hit Mistral
+_CLASSIFICATION_CACHE_TTL = 3600
+_NEGATIVE_CACHE_TTL = 60
+_LOW_CONFIDENCE = 0.3
+
+# Classifications at or above this confidence keep the LLM's complexity,
+# entities and intent instead of re-deriving them locally
+_TRUSTED_CONFIDENCE = 0.7
+_VALID_COMPLEXITIES = ("simple", "medium", "complex")
+
+# Query classification indicators
+_SQL_INDICATORS = (
+    "how many", "count", "total", "sum", "average", "max", "min",
+    "list", "show", "display", "get", "find", "search",
+    "employees", "salary", "department", "position", "hire date",
+    "database", "table", "record", "data"
+)
+
+_DOCUMENT_INDICATORS = (
+    "resume", "cv", "document", "file", "pdf", "contract",
+    "review", "performance", "evaluation", "feedback",
+    "policy", "procedure", "guideline", "manual",
+    "skills", "experience", "education", "qualification"
+)
+
+_HYBRID_INDICATORS = (
+    "with", "having", "containing", "including", "that have",
+    "who", "which", "where", "when", "and", "or"
+)
+
+# Query complexity indicators
+_COMPLEXITY_INDICATORS = {
+    "simple": ("count", "list", "show", "get"),
+    "medium": ("average", "sum", "group by", "order by"),
+    "complex": ("join", "subquery", "union", "having", "case when")
+}
+
+def _split_indicators(indicators: Tuple[str, ...]) -> Tuple[frozenset, Tuple[str, ...]]:
+    """Split indicators into single tokens (set lookup) and multi-word phrases (substring scan)"""
+    return (
+        frozenset(indicator for indicator in indicators if " " not in indicator),
+        tuple(indicator for indicator in indicators if " " in indicator)
+    )
+
+_SQL_SINGLE, _SQL_MULTI = _split_indicators(_SQL_INDICATORS)
+_DOCUMENT_SINGLE, _DOCUMENT_MULTI = _split_indicators(_DOCUMENT_INDICATORS)
+_HYBRID_SINGLE, _HYBRID_MULTI = _split_indicators(_HYBRID_INDICATORS)
+_COMPLEX_SINGLE, _COMPLEX_MULTI = _split_indicators(_COMPLEXITY_INDICATORS["complex"])
+_MEDIUM_SINGLE, _MEDIUM_MULTI = _split_indicators(_COMPLEXITY_INDICATORS["medium"])
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+def _match_indicators(query_lower: str, tokens: frozenset, single: frozenset, multi: Tuple[str, ...]) -> frozenset:
+    """Get indicators present in a query, by token membership or phrase containment"""
+    return (tokens & single).union(phrase for phrase in multi if phrase in query_lower)
+
+# Input sanitization patterns (XSS, command injection)
+_SCRIPT_TAG_PATTERN = re.compile(r'<script[^>]*>.*?</script>', re.IGNORECASE | re.DOTALL)
+_DANGEROUS_TAG_PATTERN = re.compile(
+    r'<\s*(iframe|object|embed|applet|meta|link|style)[^>]*>.*?</\s*\1\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+_HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+_DANGEROUS_PROTOCOL_PATTERNS = tuple(
+    re.compile(protocol, re.IGNORECASE) for protocol in ('javascript:', 'data:', 'vbscript:')
+)
+_COMMAND_INJECTION_REPLACEMENTS = (
+    ('&&', ' and '),
+    ('||', ' or '),
+    (';', ' '),
+    ('|', ' '),
+    ('`', "'"),
+    ('$', ''),
+)
+
+# Query preprocessing patterns
+_STOP_PHRASE_PATTERN = re.compile(r'\b(?:please|can\s+you|could\s+you|i\s+want|i\s+need)\b')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query, drop stop phrases and collapse whitespace"""
+    normalized = _STOP_PHRASE_PATTERN.sub('', query.lower())
+    return _WHITESPACE_PATTERN.sub(' ', normalized).strip()
+
+def _classification_cache_key(query: str) -> str:
+    """Process-independent cache key for a query, shared by all workers and restarts"""
+    digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+    return f"{_CLASSIFICATION_CACHE_PREFIX}:{digest}"
+
+# Complexity patterns: joins, grouping, ordering or multiple conditions
+_COMPLEX_PATTERN = re.compile(
+    r'\b(?:join|union|subquery|having|case when|group by|order by)\b'
+    r'|\b(?:and|or)\b.*\b(?:and|or)\b'
+)
+_MEDIUM_PATTERN = re.compile(r'\b(?:where|filter|search|avg|sum|count|max|min|and|or)\b')
+
+# Entity surface forms mapped to entity types, matched at word starts so
+# plurals such as "employees" still count
+_ENTITY_PATTERNS = {
+    "employee": ["employee", "staff", "worker", "person"],
+    "department": ["department", "dept", "team", "division"],
+    "salary": ["salary", "pay", "wage", "compensation", "income"],
+    "position": ["position", "role", "job", "title"],
+    "skill": ["skill", "ability", "competency", "expertise"],
+    "experience": ["experience", "exp", "years", "background"],
+    "education": ["education", "degree", "qualification", "diploma"]
+}
+_ENTITY_SURFACE_FORMS = {
+    surface: entity_type
+    for entity_type, surfaces in _ENTITY_PATTERNS.items()
+    for surface in surfaces
+}
+_ENTITY_PATTERN = re.compile(
+    r'\b(' + '|'.join(map(re.escape, sorted(_ENTITY_SURFACE_FORMS, key=len, reverse=True))) + ')'
+)
+
+# Intent patterns, checked in priority order; each branch is a lookahead over
+# the whole query so the first intent with any match is the one reported.
+_INTENT_PATTERNS = {
+    "count": ["how many", "count", "total", "number of"],
+    "list": ["list", "show", "display", "get", "find"],
+    "search": ["search", "find", "look for", "locate"],
+    "analyze": ["analyze", "compare", "average", "sum", "max", "min"],
+    "filter": ["filter", "where", "with", "having", "that have"]
+}
+_INTENT_PATTERN = re.compile(
+    '|'.join(
+        f'(?=.*?(?P<{intent}>{"|".join(map(re.escape, patterns))}))'
+        for intent, patterns in _INTENT_PATTERNS.items()
+    ),
+    re.DOTALL
+)
+
+# Last formatted timestamp, reused for calls within the same millisecond
+_timestamp_cache: Tuple[int, str] = (0, "")
+
+def _get_timestamp() -> str:
+    """Get current UTC timestamp in ISO format, cached to millisecond granularity"""
+    global _timestamp_cache
+    now_ns = time.time_ns()
+    cached_ns, cached_iso = _timestamp_cache
+    if now_ns - cached_ns < 1_000_000:
+        return cached_iso
+    
+    timestamp = datetime.utcfromtimestamp(now_ns / 1_000_000_000).isoformat()
+    _timestamp_cache = (now_ns, timestamp)
+    return timestamp
+
+def _extract_json_span(text: str) -> Optional[str]:
+    """Extract the first brace-balanced JSON object from text in a single pass"""
+    depth = 0
+    start = -1
+    in_string = False
+    escaped = False
+    
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            if depth > 0:
+                in_string = True
+        elif char == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    
+    return None
+
+def _encode_classification(result: Dict[str, Any]) -> bytes:
+    """Encode a classification result for caching"""
+    return zstandard.compress(msgpack.packb(result, use_bin_type=True), 1)
+
+def _decode_classification(payload: bytes) -> Dict[str, Any]:
+    """Decode a cached classification result"""
+    return msgpack.unpackb(zstandard.decompress(payload), raw=False)
+
 class QueryClassifier:
     """Intelligent query classification using Mistral API"""
     
@@ -23,32 +226,11 @@ class QueryClassifier:
         self.db_utils = None
         self.redis_service = None
         
-        # Query classification patterns
-        self.sql_indicators = [
-            "how many", "count", "total", "sum", "average", "max", "min",
-            "list", "show", "display", "get", "find", "search",
-            "employees", "salary", "department", "position", "hire date",
-            "database", "table", "record", "data"
-        ]
-        
-        self.document_indicators = [
-            "resume", "cv", "document", "file", "pdf", "contract",
-            "review", "performance", "evaluation", "feedback",
-            "policy", "procedure", "guideline", "manual",
-            "skills", "experience", "education", "qualification"
-        ]
-        
-        self.hybrid_indicators = [
-            "with", "having", "containing", "including", "that have",
-            "who", "which", "where", "when", "and", "or"
-        ]
-        
-        # Query complexity patterns
-        self.complexity_indicators = {
-            "simple": ["count", "list", "show", "get"],
-            "medium": ["average", "sum", "group by", "order by"],
-            "complex": ["join", "subquery", "union", "having", "case when"]
-        }
+        # Cache hits and misses not yet added to the Redis counters
+        self._stats_lock = threading.Lock()
+        self._pending_hits = 0
+        self._pending_misses = 0
+        self._stats_flushed_at = time.monotonic()
     
     def initialize(self):
         """Initialize the query classifier"""
@@ -64,23 +246,30 @@ class QueryClassifier:
             self.logger.error(f"Failed to initialize query classifier: {str(e)}")
             raise
     
-    def classify_query(self, query: str, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def classify_query(
+        self,
+        query: str,
+        user_context: Optional[Dict[str, Any]] = None,
+        force_recompute: bool = False
+    ) -> Dict[str, Any]:
         """
         Classify a natural language query using Mistral API
         
         Args:
             query: Natural language query to classify
             user_context: Optional user context information
+            force_recompute: Bypass the cache and always run the local analyzers
             
         Returns:
             Classification result with type, confidence, and metadata
         """
+        cache_key = None
         try:
             self.logger.info(f"Classifying query: {query[:100]}...")
             
             # Check cache first
-            cache_key = f"query_classification:{hash(query)}"
-            cached_result = self._get_cached_classification(cache_key)
+            cache_key = _classification_cache_key(query)
+            cached_result = None if force_recompute else self._get_cached_classification(cache_key)
             if cached_result:
                 self.logger.info("Using cached classification result")
                 return cached_result
@@ -92,7 +281,7 @@ class QueryClassifier:
             classification_result = self._analyze_query_with_mistral(processed_query, user_context)
             
             # Validate and enhance classification
-            enhanced_result = self._enhance_classification(processed_query, classification_result)
+            enhanced_result = self._enhance_classification(processed_query, classification_result, force_recompute)
             
             # Cache result
             self._cache_classification(cache_key, enhanced_result)
@@ -103,13 +292,19 @@ class QueryClassifier:
             
         except Exception as e:
             self.logger.error(f"Query classification failed: {str(e)}")
-            return {
+            error_result = {
                 "query": query,
                 "query_type": "unknown",
                 "confidence": 0.0,
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _get_timestamp()
             }
+            
+            # Negative-cache the failure so identical retries stay cheap
+            if cache_key:
+                self._cache_classification(cache_key, error_result)
+            
+            return error_result
     
     def _preprocess_query(self, query: str) -> str:
         """Preprocess query for better classification with security sanitization"""
@@ -117,21 +312,7 @@ class QueryClassifier:
             # Security: Remove potentially dangerous content FIRST
             query = self._sanitize_input(query)
             
-            # Normalize whitespace
-            processed = re.sub(r'\s+', ' ', query.strip())
-            
-            # Convert to lowercase for pattern matching
-            processed_lower = processed.lower()
-            
-            # Remove common stop words that don't affect classification
-            stop_words = ['please', 'can you', 'could you', 'i want', 'i need']
-            for stop_word in stop_words:
-                processed_lower = processed_lower.replace(stop_word, '')
-            
-            # Clean up extra spaces
-            processed = re.sub(r'\s+', ' ', processed_lower.strip())
-            
-            return processed
+            return normalize_query(query)
             
         except Exception as e:
             self.logger.error(f"Query preprocessing failed: {str(e)}")
@@ -141,36 +322,20 @@ class QueryClassifier:
         """Remove potentially dangerous content from input (XSS, command injection)"""
         try:
             # Remove script tags and their content
-            text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.IGNORECASE | re.DOTALL)
+            text = _SCRIPT_TAG_PATTERN.sub('', text)
             
             # Remove other potentially dangerous HTML tags
-            text = re.sub(r'<\s*(iframe|object|embed|applet|meta|link|style)[^>]*>.*?</\s*\1\s*>', '', text, flags=re.IGNORECASE | re.DOTALL)
+            text = _DANGEROUS_TAG_PATTERN.sub('', text)
             
             # Remove standalone HTML tags
-            text = re.sub(r'<[^>]+>', '', text)
-            
-            # Remove javascript: protocol (XSS vector)
-            text = re.sub(r'javascript:', '', text, flags=re.IGNORECASE)
+            text = _HTML_TAG_PATTERN.sub('', text)
             
-            # Remove data: protocol (XSS vector)
-            text = re.sub(r'data:', '', text, flags=re.IGNORECASE)
-            
-            # Remove vbscript: protocol (XSS vector)
-            text = re.sub(r'vbscript:', '', text, flags=re.IGNORECASE)
+            # Remove javascript:, data: and vbscript: protocols (XSS vectors)
+            for protocol_pattern in _DANGEROUS_PROTOCOL_PATTERNS:
+                text = protocol_pattern.sub('', text)
             
             # Remove command injection patterns
-            dangerous_patterns = {
-                '&&': ' and ',
-                '||': ' or ',
-                ';': ' ',
-                '|': ' ',
-                '`': "'",
-                '$': '',
-                '$(': '',
-                '${': ''
-            }
-            
-            for pattern, replacement in dangerous_patterns.items():
+            for pattern, replacement in _COMMAND_INJECTION_REPLACEMENTS:
                 text = text.replace(pattern, replacement)
             
             # Remove null bytes
@@ -240,10 +405,9 @@ Respond only with valid JSON.
         """Parse Mistral API response for classification"""
         try:
             # Try to extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                result = json.loads(json_str)
+            json_str = _extract_json_span(response)
+            if json_str:
+                result = orjson.loads(json_str)
                 
                 # Validate required fields
                 required_fields = ['query_type', 'confidence', 'reasoning', 'entities', 'intent', 'complexity']
@@ -325,11 +489,14 @@ Respond only with valid JSON.
         """Fallback pattern-based classification when Mistral API fails"""
         try:
             query_lower = query.lower()
+            tokens = frozenset(_TOKEN_PATTERN.findall(query_lower))
             
             # Count indicators for each type
-            sql_score = sum(1 for indicator in self.sql_indicators if indicator in query_lower)
-            document_score = sum(1 for indicator in self.document_indicators if indicator in query_lower)
-            hybrid_score = sum(1 for indicator in self.hybrid_indicators if indicator in query_lower)
+            sql_matches = _match_indicators(query_lower, tokens, _SQL_SINGLE, _SQL_MULTI)
+            document_matches = _match_indicators(query_lower, tokens, _DOCUMENT_SINGLE, _DOCUMENT_MULTI)
+            sql_score = len(sql_matches)
+            document_score = len(document_matches)
+            hybrid_score = len(_match_indicators(query_lower, tokens, _HYBRID_SINGLE, _HYBRID_MULTI))
             
             # Determine query type
             if hybrid_score > 0 and (sql_score > 0 or document_score > 0):
@@ -347,21 +514,17 @@ Respond only with valid JSON.
             
             # Determine complexity
             complexity = "simple"
-            for complex_indicator in self.complexity_indicators["complex"]:
-                if complex_indicator in query_lower:
-                    complexity = "complex"
-                    break
-            else:
-                for medium_indicator in self.complexity_indicators["medium"]:
-                    if medium_indicator in query_lower:
-                        complexity = "medium"
-                        break
+            if _match_indicators(query_lower, tokens, _COMPLEX_SINGLE, _COMPLEX_MULTI):
+                complexity = "complex"
+            elif _match_indicators(query_lower, tokens, _MEDIUM_SINGLE, _MEDIUM_MULTI):
+                complexity = "medium"
             
             # Extract entities (simple pattern matching)
-            entities = []
-            for indicator in self.sql_indicators + self.document_indicators:
-                if indicator in query_lower:
-                    entities.append(indicator)
+            matched_indicators = sql_matches | document_matches
+            entities = [
+                indicator for indicator in _SQL_INDICATORS + _DOCUMENT_INDICATORS
+                if indicator in matched_indicators
+            ]
             
             return {
                 "query_type": query_type,
@@ -376,11 +539,16 @@ Respond only with valid JSON.
             self.logger.error(f"Fallback classification failed: {str(e)}")
             return self._get_default_classification()
     
-    def _enhance_classification(self, query: str, classification_result: Dict[str, Any]) -> Dict[str, Any]:
-        """Enhance classification with additional analysis"""
+    def _enhance_classification(
+        self,
+        query: str,
+        classification_result: Dict[str, Any],
+        force_recompute: bool = False
+    ) -> Dict[str, Any]:
+        """Enhance classification with additional analysis where the LLM result is missing or untrusted"""
         try:
             # Add timestamp
-            classification_result["timestamp"] = datetime.utcnow().isoformat()
+            classification_result["timestamp"] = _get_timestamp()
             
             # Add query preprocessing info
             classification_result["original_query"] = query
@@ -396,18 +564,25 @@ Respond only with valid JSON.
             if classification_result.get("query_type") not in valid_types:
                 classification_result["query_type"] = "unknown"
             
+            # Trust the LLM's own fields for confident classifications
+            trust_result = (
+                not force_recompute
+                and classification_result.get("confidence", 0.0) >= _TRUSTED_CONFIDENCE
+            )
+            
             # Add complexity analysis
-            complexity = self._analyze_complexity(query)
-            classification_result["complexity"] = complexity
+            if not trust_result or classification_result.get("complexity") not in _VALID_COMPLEXITIES:
+                classification_result["complexity"] = self._analyze_complexity(query)
             
             # Add entity extraction
-            entities = self._extract_entities(query)
-            if entities:
-                classification_result["entities"] = entities
+            if not trust_result or not classification_result.get("entities"):
+                entities = self._extract_entities(query)
+                if entities:
+                    classification_result["entities"] = entities
             
             # Add intent analysis
-            intent = self._analyze_intent(query, classification_result.get("query_type"))
-            classification_result["intent"] = intent
+            if not trust_result or classification_result.get("intent") in (None, "", "unknown"):
+                classification_result["intent"] = self._analyze_intent(query, classification_result.get("query_type"))
             
             return classification_result
             
@@ -421,27 +596,12 @@ Respond only with valid JSON.
             query_lower = query.lower()
             
             # Check for complex patterns
-            complex_patterns = [
-                r'\b(join|union|subquery|having|case when)\b',
-                r'\b(and|or)\b.*\b(and|or)\b',  # Multiple conditions
-                r'\b(group by|order by|having)\b',
-                r'\b(avg|sum|count|max|min)\b.*\b(group by)\b'
-            ]
-            
-            for pattern in complex_patterns:
-                if re.search(pattern, query_lower):
-                    return "complex"
+            if _COMPLEX_PATTERN.search(query_lower):
+                return "complex"
             
             # Check for medium patterns
-            medium_patterns = [
-                r'\b(where|filter|search)\b',
-                r'\b(avg|sum|count|max|min)\b',
-                r'\b(and|or)\b'
-            ]
-            
-            for pattern in medium_patterns:
-                if re.search(pattern, query_lower):
-                    return "medium"
+            if _MEDIUM_PATTERN.search(query_lower):
+                return "medium"
             
             return "simple"
             
@@ -452,27 +612,8 @@ Respond only with valid JSON.
     def _extract_entities(self, query: str) -> List[str]:
         """Extract entities from query"""
         try:
-            entities = []
-            query_lower = query.lower()
-            
-            # Extract common entities
-            entity_patterns = {
-                "employee": ["employee", "staff", "worker", "person"],
-                "department": ["department", "dept", "team", "division"],
-                "salary": ["salary", "pay", "wage", "compensation", "income"],
-                "position": ["position", "role", "job", "title"],
-                "skill": ["skill", "ability", "competency", "expertise"],
-                "experience": ["experience", "exp", "years", "background"],
-                "education": ["education", "degree", "qualification", "diploma"]
-            }
-            
-            for entity_type, patterns in entity_patterns.items():
-                for pattern in patterns:
-                    if pattern in query_lower:
-                        entities.append(entity_type)
-                        break
-            
-            return list(set(entities))  # Remove duplicates
+            # Map every matched surface form to its entity type (deduplicated)
+            return list({_ENTITY_SURFACE_FORMS[match] for match in _ENTITY_PATTERN.findall(query.lower())})
             
         except Exception as e:
             self.logger.error(f"Entity extraction failed: {str(e)}")
@@ -483,18 +624,10 @@ Respond only with valid JSON.
         try:
             query_lower = query.lower()
             
-            # Intent patterns
-            intent_patterns = {
-                "count": ["how many", "count", "total", "number of"],
-                "list": ["list", "show", "display", "get", "find"],
-                "search": ["search", "find", "look for", "locate"],
-                "analyze": ["analyze", "compare", "average", "sum", "max", "min"],
-                "filter": ["filter", "where", "with", "having", "that have"]
-            }
-            
-            for intent, patterns in intent_patterns.items():
-                if any(pattern in query_lower for pattern in patterns):
-                    return intent
+            # Intent patterns (first matching group wins)
+            intent_match = _INTENT_PATTERN.match(query_lower)
+            if intent_match:
+                return intent_match.lastgroup
             
             # Default intent based on query type
             if query_type == "SQL_QUERY":
@@ -514,9 +647,10 @@ Respond only with valid JSON.
             if not self.redis_service:
                 return None
             
-            cached_result = self.redis_service.get(cache_key)
+            cached_result = self.redis_service.get_binary(cache_key)
+            self._record_cache_lookup(bool(cached_result))
             if cached_result:
-                return json.loads(cached_result)
+                return _decode_classification(cached_result)
             
             return None
             
@@ -524,14 +658,42 @@ Respond only with valid JSON.
             self.logger.error(f"Failed to get cached classification: {str(e)}")
             return None
     
+    def _record_cache_lookup(self, hit: bool):
+        """Count a cache hit or miss, flushing the counts to Redis when a flush is due"""
+        with self._stats_lock:
+            if hit:
+                self._pending_hits += 1
+            else:
+                self._pending_misses += 1
+            due = time.monotonic() - self._stats_flushed_at >= _STATS_FLUSH_INTERVAL
+        
+        if due:
+            self._flush_cache_stats()
+    
+    def _flush_cache_stats(self):
+        """Add the hits and misses counted since the last flush to the shared Redis counters"""
+        with self._stats_lock:
+            hits, misses = self._pending_hits, self._pending_misses
+            self._pending_hits = self._pending_misses = 0
+            self._stats_flushed_at = time.monotonic()
+        
+        if hits:
+            self.redis_service.increment(_CLASSIFICATION_HITS_KEY, hits)
+        if misses:
+            self.redis_service.increment(_CLASSIFICATION_MISSES_KEY, misses)
+    
     def _cache_classification(self, cache_key: str, result: Dict[str, Any]):
         """Cache classification result"""
         try:
             if not self.redis_service:
                 return
             
-            # Cache for 1 hour
-            self.redis_service.set(cache_key, json.dumps(result), expire=3600)
+            # Cache for 1 hour, or briefly for unknown / low-confidence results
+            ttl = _CLASSIFICATION_CACHE_TTL
+            if result.get("query_type") == "unknown" or result.get("confidence", 0.0) < _LOW_CONFIDENCE:
+                ttl = _NEGATIVE_CACHE_TTL
+            
+            self.redis_service.set_binary(cache_key, _encode_classification(result), ttl=ttl)
             
         except Exception as e:
             self.logger.error(f"Failed to cache classification: {str(e)}")
@@ -542,14 +704,14 @@ Respond only with valid JSON.
             if not self.redis_service:
                 return {"error": "Redis service not available"}
             
-            # Get cached classifications count
-            pattern = "query_classification:*"
+            # Get cached classifications
+            pattern = f"{_CLASSIFICATION_CACHE_PREFIX}:*"
             keys = self.redis_service.scan_keys(pattern)
             
             stats = {
                 "total_classifications": len(keys),
-                "cache_hit_rate": 0.0,  # Would need to track hits/misses
-                "average_confidence": 0.0,  # Would need to track confidences
+                "cache_hit_rate": 0.0,
+                "average_confidence": 0.0,
                 "query_types": {
                     "SQL_QUERY": 0,
                     "DOCUMENT_QUERY": 0,
@@ -558,6 +720,31 @@ Respond only with valid JSON.
                 }
             }
             
+            # Fetch counters, including this process's latest counts, and cached results in pipelined batches
+            self._flush_cache_stats()
+            hits, misses, *payloads = self.redis_service.get_binary_batch(
+                [_CLASSIFICATION_HITS_KEY, _CLASSIFICATION_MISSES_KEY] + keys
+            )
+            hits, misses = int(hits or 0), int(misses or 0)
+            if hits + misses > 0:
+                stats["cache_hit_rate"] = hits / (hits + misses)
+            
+            total_confidence = 0.0
+            decoded_count = 0
+            for payload in payloads:
+                if not payload:
+                    continue
+                result = _decode_classification(payload)
+                query_type = result.get("query_type", "unknown")
+                if query_type not in stats["query_types"]:
+                    query_type = "unknown"
+                stats["query_types"][query_type] += 1
+                total_confidence += result.get("confidence", 0.0)
+                decoded_count += 1
+            
+            if decoded_count > 0:
+                stats["average_confidence"] = total_confidence / decoded_count
+            
             return stats
             
         except Exception as e:
@@ -566,6 +753,7 @@ Respond only with valid JSON.
 
 # Global query classifier instance
 query_classifier: Optional[QueryClassifier] = None
+_query_classifier_lock = threading.Lock()
 
 def get_query_classifier() -> QueryClassifier:
     """Get the global query classifier instance"""
@@ -574,8 +762,12 @@ def get_query_classifier() -> QueryClassifier:
     return query_classifier
 
 def initialize_query_classifier() -> QueryClassifier:
-    """Initialize the global query classifier"""
+    """Initialize the global query classifier, or return it if it already is"""
     global query_classifier
-    query_classifier = QueryClassifier()
-    query_classifier.initialize()
+    # Startup and a first request may race to initialize; only one does
+    with _query_classifier_lock:
+        if query_classifier is None:
+            classifier = QueryClassifier()
+            classifier.initialize()
+            query_classifier = classifier
     return query_classifier
@@ -2,22 +2,46 @@
 Query Processing Engine
 Handles natural language query processing with LLM integration
 """
-from typing import Dict, Any
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
 import logging
 from .mistral_client import MistralClient
+from .query_classifier import normalize_query
+from .redis_service import get_redis_service
+from .schema_service import get_schema_service
 
 logger = logging.getLogger(__name__)
 
+# Response cache settings; keys also carry the connection, schema version and
+# user role, so bump the version only when the response shape changes
+_QUERY_CACHE_PREFIX = "query_engine:v2"
+_QUERY_CACHE_TTL = 3600
+_LOCAL_CACHE_MAX = 4096
+
+# Shared pool for running the independent Mistral calls of a query concurrently
+_mistral_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="query-engine")
+
 class QueryEngine:
     def __init__(self, connection_string: str = None):
         self.connection_string = connection_string
         self.logger = logger
         self.mistral_client = MistralClient()
-        # TODO: Initialize schema discovery and cache
+        # TODO: Initialize schema discovery
         # self.schema = SchemaDiscovery().analyze_database(connection_string)
-        # self.cache = QueryCache()
+        
+        # Local LRU cache in front of Redis for repeated queries
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        try:
+            self.redis_service = get_redis_service()
+        except RuntimeError:
+            self.redis_service = None
     
-    def process_query(self, user_query: str) -> Dict[str, Any]:
+    def process_query(self, user_query: str, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Process natural language query with:
         - Query classification (SQL vs document search vs hybrid)
@@ -28,34 +52,140 @@ class QueryEngine:
         self.logger.info(f"Processing query: {user_query}")
         
         try:
-            # Step 1: Classify query type
-            classification_result = self.mistral_client.classify_query_type(user_query)
-            query_type = classification_result.get("content", "sql").strip().lower()
+            # Check cache first
+            cache_key = self._generate_cache_key(user_query, user_context)
+            cached_response = self._get_cached_response(cache_key)
+            if cached_response:
+                return cached_response
+            
+            # Steps 1-2: Classify query type and extract entities concurrently
+            classification_future = _mistral_executor.submit(self.mistral_client.classify_query_type, user_query)
+            entities_future = _mistral_executor.submit(self.mistral_client.extract_entities, user_query)
+            
+            response = self._dispatch_query(user_query, classification_future.result(), entities_future.result())
+            self._cache_response(cache_key, response)
+            return response
+                
+        except Exception as e:
+            self.logger.error(f"Error processing query: {str(e)}")
+            return self._get_error_response(e)
+    
+    async def process_query_async(self, user_query: str, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of process_query for callers already running in an event loop"""
+        self.logger.info(f"Processing query: {user_query}")
+        
+        try:
+            # Check cache first
+            cache_key = self._generate_cache_key(user_query, user_context)
+            cached_response = self._get_cached_response(cache_key)
+            if cached_response:
+                return cached_response
             
-            # Step 2: Extract entities and terms
-            entities_result = self.mistral_client.extract_entities(user_query)
+            # Steps 1-2: Classify query type and extract entities concurrently
+            classification_result, entities_result = await asyncio.gather(
+                asyncio.to_thread(self.mistral_client.classify_query_type, user_query),
+                asyncio.to_thread(self.mistral_client.extract_entities, user_query)
+            )
             
-            # Step 3: Process based on query type
-            if query_type == "sql":
-                return self._process_sql_query(user_query, entities_result)
-            elif query_type == "document":
-                return self._process_document_query(user_query, entities_result)
-            else:  # hybrid
-                return self._process_hybrid_query(user_query, entities_result)
+            response = self._dispatch_query(user_query, classification_result, entities_result)
+            self._cache_response(cache_key, response)
+            return response
                 
         except Exception as e:
             self.logger.error(f"Error processing query: {str(e)}")
-            return {
-                "query_id": "error",
-                "query_type": "error",
-                "results": {},
-                "performance": {
-                    "response_time": 0.0,
-                    "cache_hit": False
-                },
-                "status": "error",
-                "error": str(e)
-            }
+            return self._get_error_response(e)
+    
+    def _dispatch_query(
+        self,
+        user_query: str,
+        classification_result: Dict[str, Any],
+        entities_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Step 3: Process based on query type"""
+        query_type = classification_result.get("content", "sql").strip().lower()
+        
+        if query_type == "sql":
+            return self._process_sql_query(user_query, entities_result)
+        elif query_type == "document":
+            return self._process_document_query(user_query, entities_result)
+        else:  # hybrid
+            return self._process_hybrid_query(user_query, entities_result)
+    
+    def _generate_cache_key(self, user_query: str, user_context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate cache key from the normalized query and the context its response is only valid for
+        
+        The connection, the schema's discovery time and the user's role are
+        part of the key, so a schema change or another role never gets a
+        response cached for a different one.
+        """
+        role = (user_context or {}).get("role") or ""
+        key_input = f"{normalize_query(user_query)}\x00{self.connection_string or ''}\x00{self._schema_version()}\x00{role}"
+        digest = hashlib.blake2b(key_input.encode(), digest_size=16).hexdigest()
+        return f"{_QUERY_CACHE_PREFIX}:{digest}"
+    
+    def _schema_version(self) -> str:
+        """Discovery time of the connection's current schema, or "" when it is unknown"""
+        if not self.connection_string:
+            return ""
+        try:
+            return get_schema_service().get_schema_version(self.connection_string) or ""
+        except Exception as e:
+            self.logger.warning(f"Failed to get schema version for query cache: {str(e)}")
+            return ""
+    
+    def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Get cached response from the local LRU, then Redis"""
+        with self._cache_lock:
+            response = self._cache.get(cache_key)
+            if response is not None:
+                self._cache.move_to_end(cache_key)
+        
+        if response is None and self.redis_service:
+            try:
+                response = self.redis_service.get_cache(cache_key)
+                if response:
+                    self._store_local(cache_key, response)
+            except Exception as e:
+                self.logger.warning(f"Failed to get cached query response: {str(e)}")
+                response = None
+        
+        if not response:
+            return None
+        
+        return {**response, "performance": {**response.get("performance", {}), "cache_hit": True}}
+    
+    def _cache_response(self, cache_key: str, response: Dict[str, Any]):
+        """Cache response locally and in Redis"""
+        self._store_local(cache_key, response)
+        
+        if self.redis_service:
+            try:
+                self.redis_service.set_cache(cache_key, response, _QUERY_CACHE_TTL)
+            except Exception as e:
+                self.logger.warning(f"Failed to cache query response: {str(e)}")
+    
+    def _store_local(self, cache_key: str, response: Dict[str, Any]):
+        """Store response in the local LRU cache, evicting the oldest entry when full"""
+        with self._cache_lock:
+            self._cache[cache_key] = response
+            self._cache.move_to_end(cache_key)
+            if len(self._cache) > _LOCAL_CACHE_MAX:
+                self._cache.popitem(last=False)
+    
+    def _get_error_response(self, error: Exception) -> Dict[str, Any]:
+        """Build the error response returned when query processing fails"""
+        return {
+            "query_id": "error",
+            "query_type": "error",
+            "results": {},
+            "performance": {
+                "response_time": 0.0,
+                "cache_hit": False
+            },
+            "status": "error",
+            "error": str(error)
+        }
     
     def _process_sql_query(self, query: str, entities: Dict[str, Any]) -> Dict[str, Any]:
         """Process SQL-only query"""
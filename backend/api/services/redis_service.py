@@ -2,27 +2,96 @@
 Redis Cache Service for High-Performance Caching and Session Management
 Handles caching strategies, session storage, and cache invalidation
 """
-import json
 import logging
 import pickle
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
 from typing import Any, Dict, List, Optional, Union
+import msgpack
+import orjson
 import redis
-from redis.exceptions import RedisError
-from datetime import datetime, timedelta
+import zstandard
+from redis import asyncio as aioredis
+from redis.exceptions import NoScriptError, RedisError
+from datetime import datetime
 import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Leading byte marking the codec of encoded cache values; values without a
+# tag are legacy JSON or plain strings
+_MSGPACK_TAG = b"\x01"
+_ZSTD_MSGPACK_TAG = b"\x02"
+_CODEC_TAGS = (_MSGPACK_TAG, _ZSTD_MSGPACK_TAG)
+
+# Encoded values larger than this are zstd-compressed
+_COMPRESSION_THRESHOLD = 4096
+_COMPRESSION_LEVEL = 3
+
+# Schema payloads are stored as tagged msgpack; the version keeps them apart
+# from JSON-encoded entries written under the old "schema:" prefix
+_SCHEMA_KEY_PREFIX = "schema:v2:"
+
+# In-process L1 cache for schema data, checked before Redis
+_SCHEMA_L1_MAX = 256
+_SCHEMA_L1_TTL = 60
+
+# Seconds an INFO/DBSIZE snapshot is reused by health and stats calls; the
+# health check's PING is always sent live
+_INFO_CACHE_TTL = 5
+
+# Socket buffer size for Redis connections; large enough that pipelined
+# batches and multi-KB schema payloads need few send/recv syscalls
+_SOCKET_BUFFER_SIZE = 512 * 1024
+
+# Atomic INCR that sets the expiry on first increment: KEYS[1]=key, ARGV[1]=ttl
+_INCR_WITH_TTL_LUA = (
+    "local n = redis.call('INCR', KEYS[1]) "
+    "if n == 1 then redis.call('EXPIRE', KEYS[1], ARGV[1]) end "
+    "return n"
+)
+
+class _LargeBufferConnection(redis.Connection):
+    """TCP Redis connection with enlarged socket buffers"""
+    
+    def _connect(self):
+        sock = super()._connect()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
 class RedisService:
-    def __init__(self, redis_url: str = "redis://localhost:6379"):
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379",
+        pool_size: int = 50,
+        pool_timeout: float = 1.0
+    ):
         """
         Initialize Redis service
         
         Args:
             redis_url: Redis connection URL
+            pool_size: Maximum number of pooled connections
+            pool_timeout: Seconds to wait for a free connection when the pool is exhausted
         """
         self.redis_url = redis_url
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.pool = None
         self.client = None
+        self.async_pool = None
+        self.async_client = None
+        self._incr_with_ttl_sha = None
+        self._schema_l1 = OrderedDict()
+        self._schema_l1_lock = threading.Lock()
+        self._info_snapshot = None
+        self._info_expires_at = 0.0
+        self._info_lock = threading.Lock()
         self.logger = logger
     
     @property
@@ -33,41 +102,67 @@ class RedisService:
     def initialize(self):
         """Initialize Redis client with connection pooling"""
         try:
-            # Parse Redis URL
-            if self.redis_url.startswith("redis://"):
-                # Extract host and port from URL
-                url_parts = self.redis_url.replace("redis://", "").split(":")
-                host = url_parts[0]
-                port = int(url_parts[1]) if len(url_parts) > 1 else 6379
-                
-                self.client = redis.Redis(
-                    host=host,
-                    port=port,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5,
-                    retry_on_timeout=True,
-                    health_check_interval=30
-                )
-            else:
-                self.client = redis.from_url(
-                    self.redis_url,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5,
-                    retry_on_timeout=True,
-                    health_check_interval=30
-                )
+            connection_kwargs = {
+                "max_connections": self.pool_size,
+                "timeout": self.pool_timeout,
+                "decode_responses": False,
+                "socket_connect_timeout": 5,
+                "socket_timeout": 5,
+                "retry_on_timeout": True,
+                "health_check_interval": 30
+            }
+            
+            # Single code path for every URL form (auth, db index, unix sockets, TLS)
+            is_tcp = urlparse(self.redis_url).scheme == "redis"
+            if is_tcp:
+                connection_kwargs["socket_keepalive"] = True
+            
+            self.pool = redis.BlockingConnectionPool.from_url(
+                self.redis_url,
+                **connection_kwargs,
+                **({"connection_class": _LargeBufferConnection} if is_tcp else {})
+            )
+            self.async_pool = aioredis.BlockingConnectionPool.from_url(
+                self.redis_url,
+                **connection_kwargs
+            )
+            
+            # Bounded pool shared by every thread using this service
+            self.client = redis.Redis(connection_pool=self.pool)
+            
+            # Non-blocking client for async request handlers
+            self.async_client = aioredis.Redis(connection_pool=self.async_pool)
             
             # Test connection
             self.client.ping()
             
-            self.logger.info("Redis service initialized successfully")
+            # Preload Lua scripts so hot paths can call them by SHA
+            self._incr_with_ttl_sha = self.client.script_load(_INCR_WITH_TTL_LUA)
+            
+            self.logger.info(f"Redis service initialized successfully (pool size {self.pool_size})")
             
         except Exception as e:
             self.logger.error(f"Failed to initialize Redis service: {str(e)}")
             raise
     
+    def shutdown(self):
+        """Close all pooled Redis connections"""
+        try:
+            if self.pool is not None:
+                self.pool.disconnect()
+                self.logger.info("Redis connection pool closed")
+        except Exception as e:
+            self.logger.error(f"Failed to close Redis connection pool: {str(e)}")
+    
+    async def ashutdown(self):
+        """Close all pooled async Redis connections"""
+        try:
+            if self.async_pool is not None:
+                await self.async_pool.disconnect()
+                self.logger.info("Async Redis connection pool closed")
+        except Exception as e:
+            self.logger.error(f"Failed to close async Redis connection pool: {str(e)}")
+    
     def set_cache(
         self, 
         key: str, 
@@ -88,14 +183,7 @@ class RedisService:
             True if successful
         """
         try:
-            if serialize:
-                # Serialize complex objects
-                if isinstance(value, (dict, list)):
-                    serialized_value = json.dumps(value)
-                else:
-                    serialized_value = str(value)
-            else:
-                serialized_value = value
+            serialized_value = self._serialize_value(value) if serialize else value
             
             if ttl:
                 result = self.client.setex(key, ttl, serialized_value)
@@ -129,20 +217,297 @@ class RedisService:
             if value is None:
                 return None
             
-            if deserialize:
-                try:
-                    # Try to deserialize JSON
-                    return json.loads(value)
-                except (json.JSONDecodeError, TypeError):
-                    # Return as string if not JSON
-                    return value
-            else:
-                return value
+            return self._deserialize_value(value) if deserialize else self._decode_raw_value(value)
                 
         except RedisError as e:
             self.logger.error(f"Failed to get cache for key '{key}': {str(e)}")
             return None
     
+    def mset_cache(
+        self,
+        mapping: Dict[str, Any],
+        ttl: Optional[int] = None,
+        serialize: bool = True
+    ) -> bool:
+        """
+        Set many cache values in a single pipelined round trip
+        
+        Args:
+            mapping: Cache keys mapped to values
+            ttl: Time to live in seconds
+            serialize: Whether to serialize the values
+            
+        Returns:
+            True if all values were set
+        """
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in mapping.items():
+                serialized_value = self._serialize_value(value) if serialize else value
+                if ttl:
+                    pipe.setex(key, ttl, serialized_value)
+                else:
+                    pipe.set(key, serialized_value)
+            
+            return all(pipe.execute())
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to set cache for {len(mapping)} keys: {str(e)}")
+            return False
+    
+    def mget_cache(
+        self,
+        keys: List[str],
+        deserialize: bool = True
+    ) -> List[Optional[Any]]:
+        """
+        Get many cache values in a single pipelined round trip
+        
+        Args:
+            keys: Cache keys
+            deserialize: Whether to deserialize the values
+            
+        Returns:
+            Cached value (or None) for each key, in order
+        """
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(key)
+            
+            values = pipe.execute()
+            decode = self._deserialize_value if deserialize else self._decode_raw_value
+            return [None if value is None else decode(value) for value in values]
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to get cache for {len(keys)} keys: {str(e)}")
+            return [None] * len(keys)
+    
+    async def aset_cache(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        serialize: bool = True
+    ) -> bool:
+        """
+        Set cache value with optional TTL without blocking the event loop
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live in seconds
+            serialize: Whether to serialize the value
+            
+        Returns:
+            True if successful
+        """
+        try:
+            serialized_value = self._serialize_value(value) if serialize else value
+            
+            if ttl:
+                result = await self.async_client.setex(key, ttl, serialized_value)
+            else:
+                result = await self.async_client.set(key, serialized_value)
+            
+            return result
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to set cache for key '{key}': {str(e)}")
+            return False
+    
+    async def aget_cache(
+        self,
+        key: str,
+        deserialize: bool = True
+    ) -> Optional[Any]:
+        """
+        Get cache value without blocking the event loop
+        
+        Args:
+            key: Cache key
+            deserialize: Whether to deserialize the value
+            
+        Returns:
+            Cached value or None
+        """
+        try:
+            value = await self.async_client.get(key)
+            
+            if value is None:
+                return None
+            
+            return self._deserialize_value(value) if deserialize else self._decode_raw_value(value)
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to get cache for key '{key}': {str(e)}")
+            return None
+    
+    async def amget_cache(
+        self,
+        keys: List[str],
+        deserialize: bool = True
+    ) -> List[Optional[Any]]:
+        """
+        Get many cache values in a single pipelined round trip without blocking the event loop
+        
+        Args:
+            keys: Cache keys
+            deserialize: Whether to deserialize the values
+            
+        Returns:
+            Cached value (or None) for each key, in order
+        """
+        try:
+            async with self.async_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.get(key)
+                values = await pipe.execute()
+            
+            decode = self._deserialize_value if deserialize else self._decode_raw_value
+            return [None if value is None else decode(value) for value in values]
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to get cache for {len(keys)} keys: {str(e)}")
+            return [None] * len(keys)
+    
+    def mdelete_cache(self, keys: List[str]) -> int:
+        """
+        Delete many cache keys in a single pipelined round trip
+        
+        Args:
+            keys: Cache keys to delete
+            
+        Returns:
+            Number of keys deleted
+        """
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in keys:
+                pipe.delete(key)
+            
+            return sum(pipe.execute())
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to delete {len(keys)} cache keys: {str(e)}")
+            return 0
+    
+    def set_binary(self, key: str, value: bytes, ttl: Optional[int] = None) -> bool:
+        """
+        Set raw binary cache value with optional TTL
+        
+        Args:
+            key: Cache key
+            value: Encoded bytes to cache
+            ttl: Time to live in seconds
+            
+        Returns:
+            True if successful
+        """
+        try:
+            if ttl:
+                return self.client.setex(key, ttl, value)
+            return self.client.set(key, value)
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to set binary cache for key '{key}': {str(e)}")
+            return False
+    
+    def get_binary(self, key: str) -> Optional[bytes]:
+        """
+        Get raw binary cache value
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached bytes or None
+        """
+        try:
+            return self.client.get(key)
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to get binary cache for key '{key}': {str(e)}")
+            return None
+    
+    def get_binary_batch(self, keys: List[str], chunk_size: int = 500) -> List[Optional[bytes]]:
+        """
+        Get many raw binary cache values using pipelined round trips
+        
+        Args:
+            keys: Cache keys to fetch
+            chunk_size: Number of keys sent per pipeline
+            
+        Returns:
+            Cached bytes (or None) for each key, in order
+        """
+        try:
+            values = []
+            for i in range(0, len(keys), chunk_size):
+                pipe = self.client.pipeline(transaction=False)
+                for key in keys[i:i + chunk_size]:
+                    pipe.get(key)
+                values.extend(pipe.execute())
+            return values
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to get binary cache batch: {str(e)}")
+            return [None] * len(keys)
+    
+    def scan_keys(self, pattern: str, count: int = 1000) -> List[str]:
+        """
+        Get all keys matching pattern without blocking the server
+        
+        Args:
+            pattern: Key pattern (e.g., "user:*")
+            count: Keys per SCAN iteration hint
+            
+        Returns:
+            Matching keys
+        """
+        try:
+            return [key.decode() for key in self.client.scan_iter(match=pattern, count=count)]
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to scan keys for pattern '{pattern}': {str(e)}")
+            return []
+    
+    def increment(self, key: str, amount: int = 1) -> Optional[int]:
+        """
+        Increment an integer counter
+        
+        Args:
+            key: Counter key
+            amount: Amount to add
+            
+        Returns:
+            New counter value or None
+        """
+        try:
+            return self.client.incrby(key, amount)
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to increment key '{key}': {str(e)}")
+            return None
+    
+    def incr_with_ttl(self, key: str, ttl: int) -> Optional[int]:
+        """
+        Atomically increment a counter, starting its TTL on first increment
+        
+        Args:
+            key: Counter key
+            ttl: Counter lifetime in seconds, counted from its first increment
+            
+        Returns:
+            New counter value or None
+        """
+        try:
+            return self._run_script(self._incr_with_ttl_sha, _INCR_WITH_TTL_LUA, [key], [ttl])
+            
+        except RedisError as e:
+            self.logger.error(f"Failed to increment key '{key}': {str(e)}")
+            return None
+    
     def delete_cache(self, key: str) -> bool:
         """
         Delete cache key
@@ -172,10 +537,20 @@ class RedisService:
             Number of keys deleted
         """
         try:
-            keys = self.client.keys(pattern)
-            if keys:
-                return self.client.delete(*keys)
-            return 0
+            # SCAN instead of KEYS so the server is never blocked, and UNLINK
+            # so memory is reclaimed asynchronously
+            pipe = self.client.pipeline(transaction=False)
+            batch = []
+            for key in self.client.scan_iter(match=pattern, count=1000):
+                batch.append(key)
+                if len(batch) >= 500:
+                    pipe.unlink(*batch)
+                    batch = []
+            
+            if batch:
+                pipe.unlink(*batch)
+            
+            return sum(pipe.execute())
             
         except RedisError as e:
             self.logger.error(f"Failed to delete pattern '{pattern}': {str(e)}")
@@ -200,15 +575,34 @@ class RedisService:
         """
         try:
             session_key = f"session:{session_id}"
+            # Expiry is enforced by the key's TTL, not a stored timestamp
             session_data["last_activity"] = datetime.utcnow().isoformat()
-            session_data["expires_at"] = (datetime.utcnow() + timedelta(seconds=ttl)).isoformat()
             
-            return self.set_cache(session_key, session_data, ttl)
+            return bool(self.set_cache(session_key, session_data, ttl))
             
         except Exception as e:
             self.logger.error(f"Failed to set session '{session_id}': {str(e)}")
             return False
     
+    def touch_session(self, session_id: str, ttl: int = 3600) -> bool:
+        """
+        Extend a session's lifetime without rewriting its data
+        
+        Args:
+            session_id: Session identifier
+            ttl: New session TTL in seconds (default: 1 hour)
+            
+        Returns:
+            True if the session exists and was refreshed
+        """
+        try:
+            session_key = f"session:{session_id}"
+            return bool(self.client.expire(session_key, ttl))
+            
+        except Exception as e:
+            self.logger.error(f"Failed to touch session '{session_id}': {str(e)}")
+            return False
+    
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """
         Get user session data
@@ -221,16 +615,8 @@ class RedisService:
         """
         try:
             session_key = f"session:{session_id}"
-            session_data = self.get_cache(session_key)
-            
-            if session_data and "expires_at" in session_data:
-                expires_at = datetime.fromisoformat(session_data["expires_at"])
-                if datetime.utcnow() > expires_at:
-                    # Session expired
-                    self.delete_cache(session_key)
-                    return None
-            
-            return session_data
+            # Expired sessions are evicted by Redis, so any hit is still valid
+            return self.get_cache(session_key)
             
         except Exception as e:
             self.logger.error(f"Failed to get session '{session_id}': {str(e)}")
@@ -315,7 +701,9 @@ class RedisService:
             True if successful
         """
         try:
-            cache_key = f"schema:{connection_hash}"
+            cache_key = _SCHEMA_KEY_PREFIX + connection_hash
+            with self._schema_l1_lock:
+                self._schema_l1.pop(connection_hash, None)
             return self.set_cache(cache_key, schema_data, ttl)
             
         except Exception as e:
@@ -324,7 +712,7 @@ class RedisService:
     
     def get_cached_schema_data(self, connection_hash: str) -> Optional[Dict[str, Any]]:
         """
-        Get cached schema data
+        Get cached schema data, serving repeat reads from an in-process cache
         
         Args:
             connection_hash: Hash of the connection string
@@ -333,8 +721,25 @@ class RedisService:
             Cached schema data or None
         """
         try:
-            cache_key = f"schema:{connection_hash}"
-            return self.get_cache(cache_key)
+            now = time.monotonic()
+            with self._schema_l1_lock:
+                entry = self._schema_l1.get(connection_hash)
+                if entry is not None:
+                    if entry[0] > now:
+                        self._schema_l1.move_to_end(connection_hash)
+                        return dict(entry[1])
+                    del self._schema_l1[connection_hash]
+            
+            cache_key = _SCHEMA_KEY_PREFIX + connection_hash
+            schema_data = self.get_cache(cache_key)
+            if isinstance(schema_data, dict):
+                with self._schema_l1_lock:
+                    self._schema_l1[connection_hash] = (now + _SCHEMA_L1_TTL, schema_data)
+                    self._schema_l1.move_to_end(connection_hash)
+                    if len(self._schema_l1) > _SCHEMA_L1_MAX:
+                        self._schema_l1.popitem(last=False)
+                return dict(schema_data)
+            return schema_data
             
         except Exception as e:
             self.logger.error(f"Failed to get cached schema data: {str(e)}")
@@ -352,7 +757,84 @@ class RedisService:
             Generated cache key
         """
         key_string = f"{prefix}:{':'.join(str(arg) for arg in args)}"
-        return hashlib.md5(key_string.encode()).hexdigest()
+        return hashlib.blake2b(key_string.encode(), digest_size=16).hexdigest()
+    
+    def _run_script(self, sha: Optional[str], script: str, keys: List[str], args: List[Any]) -> Any:
+        """Run a preloaded Lua script by SHA, falling back to EVAL if the server lost it"""
+        if sha:
+            try:
+                return self.client.evalsha(sha, len(keys), *keys, *args)
+            except NoScriptError:
+                pass
+        return self.client.eval(script, len(keys), *keys, *args)
+    
+    def _serialize_value(self, value: Any) -> Union[bytes, str]:
+        """Serialize a value for caching"""
+        # Serialize complex objects
+        if isinstance(value, (dict, list)):
+            payload = msgpack.packb(value, use_bin_type=True)
+            if len(payload) > _COMPRESSION_THRESHOLD:
+                return _ZSTD_MSGPACK_TAG + zstandard.compress(payload, _COMPRESSION_LEVEL)
+            return _MSGPACK_TAG + payload
+        return str(value)
+    
+    def _deserialize_value(self, value: Any) -> Any:
+        """Deserialize a cached value"""
+        if isinstance(value, bytes):
+            tag = value[:1]
+            if tag == _MSGPACK_TAG:
+                return msgpack.unpackb(value[1:], raw=False)
+            if tag == _ZSTD_MSGPACK_TAG:
+                return msgpack.unpackb(zstandard.decompress(value[1:]), raw=False)
+        
+        try:
+            # Try to deserialize legacy JSON (orjson parses bytes directly)
+            return orjson.loads(value)
+        except (orjson.JSONDecodeError, TypeError):
+            # Return as string if not JSON
+            return self._decode_raw_value(value)
+    
+    def _decode_raw_value(self, value: Any) -> Any:
+        """Return a raw cached value, decoding plain text to str"""
+        if isinstance(value, bytes) and value[:1] not in _CODEC_TAGS:
+            return value.decode("utf-8", errors="replace")
+        return value
+    
+    def _refresh_info(self, ping: bool = False) -> Dict[str, Any]:
+        """
+        Fetch INFO and DBSIZE, reusing them for a few seconds, in one
+        pipelined round trip with a live PING when asked
+        
+        Args:
+            ping: Always send a PING and time the round trip
+            
+        Returns:
+            Snapshot with the server info and key count, plus the round-trip
+            time when pinged
+        """
+        with self._info_lock:
+            fresh = self._info_snapshot is not None and time.monotonic() < self._info_expires_at
+            if fresh and not ping:
+                return self._info_snapshot
+            
+            start_time = time.perf_counter()
+            pipe = self.client.pipeline(transaction=False)
+            if ping:
+                pipe.ping()
+            if not fresh:
+                pipe.info()
+                pipe.dbsize()
+            results = pipe.execute()
+            response_time = time.perf_counter() - start_time
+            
+            if not fresh:
+                info, dbsize = results[-2:]
+                self._info_snapshot = {"info": info, "dbsize": dbsize}
+                self._info_expires_at = time.monotonic() + _INFO_CACHE_TTL
+            
+            if ping:
+                return {**self._info_snapshot, "response_time": response_time}
+            return self._info_snapshot
     
     def health_check(self) -> Dict[str, Any]:
         """
@@ -362,17 +844,12 @@ class RedisService:
             Health check results
         """
         try:
-            # Test basic connectivity
-            start_time = datetime.utcnow()
-            self.client.ping()
-            response_time = (datetime.utcnow() - start_time).total_seconds()
-            
-            # Get Redis info
-            info = self.client.info()
+            snapshot = self._refresh_info(ping=True)
+            info = snapshot["info"]
             
             return {
                 "status": "healthy",
-                "response_time": response_time,
+                "response_time": snapshot["response_time"],
                 "redis_version": info.get("redis_version"),
                 "used_memory": info.get("used_memory_human"),
                 "connected_clients": info.get("connected_clients"),
@@ -395,10 +872,11 @@ class RedisService:
             Cache statistics
         """
         try:
-            info = self.client.info()
+            snapshot = self._refresh_info()
+            info = snapshot["info"]
             
             return {
-                "total_keys": self.client.dbsize(),
+                "total_keys": snapshot["dbsize"],
                 "used_memory": info.get("used_memory_human"),
                 "hit_rate": info.get("keyspace_hits", 0) / max(info.get("keyspace_hits", 0) + info.get("keyspace_misses", 0), 1),
                 "connected_clients": info.get("connected_clients"),
@@ -427,9 +905,13 @@ def get_redis_service() -> RedisService:
         raise RuntimeError("Redis service not initialized")
     return redis_service
 
-def initialize_redis_service(redis_url: str) -> RedisService:
+def initialize_redis_service(
+    redis_url: str,
+    pool_size: int = 50,
+    pool_timeout: float = 1.0
+) -> RedisService:
     """Initialize the global Redis service"""
     global redis_service
-    redis_service = RedisService(redis_url)
+    redis_service = RedisService(redis_url, pool_size, pool_timeout)
     redis_service.initialize()
     return redis_service
@@ -2,16 +2,108 @@
 Schema Discovery Service
 Main service that orchestrates schema discovery and natural language mapping
 """
+import copy
 import logging
-from typing import Dict, List, Any, Optional
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Mapping, Optional
 from datetime import datetime, timedelta
 from .dynamic_schema_discovery import DynamicSchemaDiscovery
 from .dynamic_natural_language_mapper import DynamicNaturalLanguageMapper
-from .database_utils import get_database_utils
+from .database_manager import get_database_manager
+from .database_utils import get_database_utils, connection_hash, connection_tag
 from .redis_service import get_redis_service
+from ..models.database_models import SystemLog
 
 logger = logging.getLogger(__name__)
 
+# Analytics log rows are queued and written in batches by a background thread
+# so that discovery and mapping requests never wait on a commit
+_LOG_QUEUE_MAX = 10000
+_LOG_BATCH_SIZE = 100
+_LOG_FLUSH_INTERVAL = 0.2
+
+_log_queue: "queue.Queue" = queue.Queue(maxsize=_LOG_QUEUE_MAX)
+_log_writer: Optional[threading.Thread] = None
+_log_writer_lock = threading.Lock()
+
+def _enqueue_system_log(
+    level: str,
+    logger_name: str,
+    template: str,
+    args: tuple,
+    module: str,
+    function: str
+) -> None:
+    """
+    Queue a log record for the background writer, dropping it if the queue is full
+    
+    The message is only formatted (template % args) and turned into a SystemLog
+    row by the writer thread, keeping that work off the request path.
+    """
+    try:
+        _log_queue.put_nowait((level, logger_name, template, args, module, function))
+    except queue.Full:
+        logger.warning("System log queue is full, dropping log entry")
+
+def _write_system_logs(batch: List[tuple]) -> None:
+    """Insert a batch of queued log records as SystemLog rows with a single commit"""
+    try:
+        log_entries = [
+            SystemLog(
+                level=level,
+                logger_name=logger_name,
+                message=template % args,
+                module=module,
+                function=function
+            )
+            for level, logger_name, template, args, module, function in batch
+        ]
+        
+        db_manager = get_database_manager()
+        with db_manager.get_session() as session:
+            session.bulk_save_objects(log_entries)
+            session.commit()
+    except Exception as e:
+        logger.warning(f"Failed to write {len(batch)} system log entries: {str(e)}")
+
+def _drain_system_logs() -> None:
+    """Background loop flushing queued log rows every batch size or flush interval"""
+    while True:
+        batch = [_log_queue.get()]
+        deadline = time.monotonic() + _LOG_FLUSH_INTERVAL
+        while len(batch) < _LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _write_system_logs(batch)
+
+# Shared pool for writing the database and Redis schema caches concurrently
+_cache_io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="schema-cache")
+
+# Process-local schema cache checked before the Redis/database-backed cache
+_MEM_CACHE_MAX = 32
+_MEM_CACHE_TTL = 60
+
+def _start_log_writer() -> None:
+    """Start the background log writer thread if it is not already running"""
+    global _log_writer
+    with _log_writer_lock:
+        if _log_writer is None or not _log_writer.is_alive():
+            _log_writer = threading.Thread(
+                target=_drain_system_logs,
+                name="schema-log-writer",
+                daemon=True
+            )
+            _log_writer.start()
+
 class SchemaService:
     """Main service for schema discovery and natural language mapping"""
     
@@ -21,14 +113,16 @@ class SchemaService:
         self.mapper = DynamicNaturalLanguageMapper()
         self.db_utils = None
         self.redis_service = None
+        self._mem_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._mem_cache_lock = threading.Lock()
+        self._col_index_cache: Dict[str, tuple] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
         
     def initialize(self):
         """Initialize the schema service"""
         try:
             # Initialize database utils and redis service
-            from .database_utils import get_database_utils
-            from .redis_service import get_redis_service
-            
             self.db_utils = get_database_utils()
             self.redis_service = get_redis_service()
             self.logger.info("Schema service initialized successfully")
@@ -47,39 +141,72 @@ class SchemaService:
             force_refresh: Force refresh of cached schema
             
         Returns:
-            Complete schema information
+            Complete schema information. On a cache hit this is the cached
+            schema object shared by all threads, so it must not be modified;
+            get_schema_info, refresh_schema and export_schema hand out copies
         """
+        introspector = None
+        inflight = None
         try:
-            # Check cache first
-            if not force_refresh:
-                cached_schema = self._get_cached_schema(connection_string)
-                if cached_schema:
-                    self.logger.info("Returning cached schema")
-                    return cached_schema
+            while inflight is None:
+                # Check cache first
+                if not force_refresh:
+                    cached_schema = self._get_remembered_schema(connection_string)
+                    if cached_schema is not None:
+                        return cached_schema
+                    
+                    cached_schema = self._get_cached_schema(connection_string)
+                    if cached_schema:
+                        self.logger.info(f"Returning cached schema [{connection_tag(connection_string)}]")
+                        self._remember_schema(connection_string, cached_schema)
+                        return cached_schema
+                
+                # Only one thread discovers a given connection string at a time;
+                # concurrent callers wait for its result instead of repeating the work
+                with self._inflight_lock:
+                    leader = self._inflight.get(connection_string)
+                    if leader is None:
+                        inflight = self._inflight[connection_string] = threading.Event()
+                
+                if leader is not None:
+                    leader.wait()
+                    schema = self._get_remembered_schema(connection_string)
+                    if schema is not None:
+                        return schema
+                    # The discovering thread failed, so go around and try again
             
             # Initialize dynamic schema discovery
-            self.introspector = DynamicSchemaDiscovery(connection_string)
-            self.introspector.initialize()
+            introspector = self.introspector = DynamicSchemaDiscovery(connection_string)
+            introspector.initialize()
             
             # Discover schema
-            self.logger.info("Starting schema discovery...")
-            schema = self.introspector.discover_schema()
+            self.logger.info(f"Starting schema discovery [{connection_tag(connection_string)}]...")
+            schema = introspector.discover_schema()
             
             # Cache the schema
+            self._remember_schema(connection_string, schema)
             self._cache_schema(connection_string, schema)
             
             # Log schema discovery
             self._log_schema_discovery(connection_string, schema)
             
-            self.logger.info(f"Schema discovery completed for {schema.get('summary', {}).get('total_tables', 0)} tables")
+            self.logger.info(f"Schema discovery completed for {schema.get('summary', {}).get('total_tables', 0)} tables [{connection_tag(connection_string)}]")
             return schema
             
         except Exception as e:
-            self.logger.error(f"Schema discovery failed: {str(e)}")
+            self.logger.error(f"Schema discovery failed [{connection_tag(connection_string)}]: {str(e)}")
             raise
         finally:
-            if self.introspector:
-                self.introspector.close()
+            if introspector:
+                introspector.close()
+            if inflight is not None:
+                with self._inflight_lock:
+                    self._inflight.pop(connection_string, None)
+                inflight.set()
+    
+    def get_schema_version(self, connection_string: str) -> Optional[str]:
+        """Discovery time of the connection's current schema, which changes whenever it is rediscovered"""
+        return self.discover_schema(connection_string).get("discovered_at")
     
     def map_query_to_schema(self, query: str, connection_string: str) -> Dict[str, Any]:
         """
@@ -126,7 +253,8 @@ class SchemaService:
         """Find columns similar to a natural language term"""
         try:
             schema = self.discover_schema(connection_string)
-            similar_columns = self.mapper.find_similar_columns(term, schema, limit)
+            index = self._get_column_index(connection_string, schema)
+            similar_columns = self.mapper.find_similar_columns_indexed(term, index, limit)
             
             # Format results
             results = []
@@ -143,6 +271,17 @@ class SchemaService:
             self.logger.error(f"Failed to find similar columns: {str(e)}")
             return []
     
+    def _get_column_index(self, connection_string: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the column index for a schema, rebuilding it only when the schema was rediscovered"""
+        discovered_at = schema.get("discovered_at")
+        entry = self._col_index_cache.get(connection_string)
+        if entry and discovered_at is not None and entry[0] == discovered_at:
+            return entry[1]
+        
+        index = self.mapper.build_column_index(schema)
+        self._col_index_cache[connection_string] = (discovered_at, index)
+        return index
+    
     def validate_schema(self, connection_string: str) -> Dict[str, Any]:
         """Validate discovered schema"""
         try:
@@ -161,24 +300,23 @@ class SchemaService:
                 validation_results["errors"].append("No tables found in database")
                 validation_results["is_valid"] = False
             
-            # Check for tables without primary keys
+            # Check primary keys and purpose confidence in a single pass over the tables
+            warnings = validation_results["warnings"]
+            recommendations = validation_results["recommendations"]
             for table_name, table_info in tables.items():
                 constraints = table_info.get("constraints", {})
                 if not constraints.get("primary_keys", {}).get("constrained_columns"):
-                    validation_results["warnings"].append(f"Table '{table_name}' has no primary key")
+                    warnings.append(f"Table '{table_name}' has no primary key")
+                
+                confidence = table_info.get("purpose", {}).get("confidence", 0)
+                if confidence < 0.5:
+                    recommendations.append(
+                        f"Table '{table_name}' purpose detection has low confidence ({confidence:.2f})"
+                    )
             
             # Check for tables without relationships
-            relationships = schema.get("relationships", [])
-            if len(relationships) == 0:
-                validation_results["warnings"].append("No relationships detected between tables")
-            
-            # Check for tables with low purpose confidence
-            for table_name, table_info in tables.items():
-                purpose = table_info.get("purpose", {})
-                if purpose.get("confidence", 0) < 0.5:
-                    validation_results["recommendations"].append(
-                        f"Table '{table_name}' purpose detection has low confidence ({purpose.get('confidence', 0):.2f})"
-                    )
+            if not schema.get("relationships"):
+                warnings.append("No relationships detected between tables")
             
             return validation_results
             
@@ -194,34 +332,40 @@ class SchemaService:
     def get_schema_statistics(self, connection_string: str) -> Dict[str, Any]:
         """Get detailed schema statistics"""
         try:
-            schema = self.discover_schema(connection_string)
+            return self._compute_statistics(self.discover_schema(connection_string))
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get schema statistics: {str(e)}")
+            return {"error": str(e)}
+    
+    def _compute_statistics(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute detailed statistics for an already discovered schema"""
+        try:
             summary = schema.get("summary", {})
             
-            # Calculate additional statistics
+            # Counter over a generator does the counting in C; every column is
+            # counted once by type, so the type counts also give the column total.
+            # Discovery already stores column types as strings, so they are used as is
             tables = schema.get("tables", {})
-            total_columns = sum(len(table.get("columns", {})) for table in tables.values())
-            
-            # Purpose distribution
-            purpose_distribution = {}
-            for table_info in tables.values():
-                purpose = table_info.get("purpose", {}).get("primary_purpose", "unknown")
-                purpose_distribution[purpose] = purpose_distribution.get(purpose, 0) + 1
-            
-            # Column type distribution
-            column_types = {}
-            for table_info in tables.values():
-                for col_info in table_info.get("columns", {}).values():
-                    col_type = str(col_info.get("type", ""))
-                    column_types[col_type] = column_types.get(col_type, 0) + 1
+            purpose_distribution = Counter(
+                table_info.get("purpose", {}).get("primary_purpose", "unknown")
+                for table_info in tables.values()
+            )
+            column_types = Counter(
+                col_info.get("type", "")
+                for table_info in tables.values()
+                for col_info in table_info.get("columns", {}).values()
+            )
+            total_columns = sum(column_types.values())
             
             return {
                 "total_tables": summary.get("total_tables", 0),
                 "total_columns": total_columns,
                 "total_relationships": summary.get("total_relationships", 0),
                 "average_columns_per_table": summary.get("average_columns_per_table", 0),
-                "purpose_distribution": purpose_distribution,
-                "column_type_distribution": dict(sorted(column_types.items(), key=lambda x: x[1], reverse=True)[:10]),
-                "schema_complexity": self._calculate_complexity_score(tables, schema.get("relationships", [])),
+                "purpose_distribution": dict(purpose_distribution),
+                "column_type_distribution": dict(column_types.most_common(10)),
+                "schema_complexity": self._calculate_complexity_score(tables, schema.get("relationships", []), total_columns),
                 "discovery_timestamp": schema.get("discovered_at")
             }
             
@@ -229,6 +373,23 @@ class SchemaService:
             self.logger.error(f"Failed to get schema statistics: {str(e)}")
             return {"error": str(e)}
     
+    def _get_remembered_schema(self, connection_string: str) -> Optional[Dict[str, Any]]:
+        """Get schema from the process-local cache if present and fresh"""
+        with self._mem_cache_lock:
+            entry = self._mem_cache.get(connection_string)
+            if entry and time.monotonic() - entry[0] < _MEM_CACHE_TTL:
+                self._mem_cache.move_to_end(connection_string)
+                return entry[1]
+        return None
+    
+    def _remember_schema(self, connection_string: str, schema: Dict[str, Any]):
+        """Store schema in the process-local cache, evicting the oldest entry when full"""
+        with self._mem_cache_lock:
+            self._mem_cache[connection_string] = (time.monotonic(), schema)
+            self._mem_cache.move_to_end(connection_string)
+            if len(self._mem_cache) > _MEM_CACHE_MAX:
+                self._mem_cache.popitem(last=False)
+    
     def _get_cached_schema(self, connection_string: str) -> Optional[Dict[str, Any]]:
         """Get cached schema if available and not expired"""
         try:
@@ -236,44 +397,52 @@ class SchemaService:
                 return self.db_utils.get_cached_schema_data(connection_string)
             return None
         except Exception as e:
-            self.logger.warning(f"Failed to get cached schema: {str(e)}")
+            self.logger.warning(f"Failed to get cached schema [{connection_tag(connection_string)}]: {str(e)}")
             return None
     
     def _cache_schema(self, connection_string: str, schema: Dict[str, Any]):
-        """Cache discovered schema"""
+        """Cache discovered schema in the database and Redis concurrently"""
+        futures = []
+        if self.db_utils:
+            futures.append(_cache_io_executor.submit(self._cache_schema_db, connection_string, schema))
+        if self.redis_service:
+            futures.append(_cache_io_executor.submit(self._cache_schema_redis, connection_string, schema))
+        
+        # Each write handles its own failure, so one backend failing never blocks the other
+        for future in futures:
+            future.result()
+    
+    def _cache_schema_db(self, connection_string: str, schema: Dict[str, Any]):
+        """Cache discovered schema in the database"""
         try:
-            if self.db_utils:
-                # Cache in database
-                from .database_manager import get_database_manager
-                db_manager = get_database_manager()
-                with db_manager.get_session() as session:
-                    self.db_utils.cache_schema_data(session, connection_string, schema, ttl_hours=24)
+            db_manager = get_database_manager()
+            with db_manager.get_session() as session:
+                self.db_utils.cache_schema_data(session, connection_string, schema, ttl_hours=24)
             
-            if self.redis_service:
-                # Also cache in Redis
-                connection_hash = self._generate_connection_hash(connection_string)
-                self.redis_service.cache_schema_data(connection_hash, schema, 86400)  # 24 hours
+        except Exception as e:
+            self.logger.warning(f"Failed to cache schema in database [{connection_tag(connection_string)}]: {str(e)}")
+    
+    def _cache_schema_redis(self, connection_string: str, schema: Dict[str, Any]):
+        """Cache discovered schema in Redis"""
+        try:
+            connection_hash = self._generate_connection_hash(connection_string)
+            self.redis_service.cache_schema_data(connection_hash, schema, 86400)  # 24 hours
             
         except Exception as e:
-            self.logger.warning(f"Failed to cache schema: {str(e)}")
+            self.logger.warning(f"Failed to cache schema in Redis [{connection_tag(connection_string)}]: {str(e)}")
     
     def _log_schema_discovery(self, connection_string: str, schema: Dict[str, Any]):
         """Log schema discovery for analytics"""
         try:
-            from .database_manager import get_database_manager
-            db_manager = get_database_manager()
-            with db_manager.get_session() as session:
-                # Log as a system event
-                from ..models.database_models import SystemLog
-                log_entry = SystemLog(
-                    level="INFO",
-                    logger_name="schema_discovery",
-                    message=f"Schema discovery completed for {schema.get('summary', {}).get('total_tables', 0)} tables",
-                    module="schema_service",
-                    function="discover_schema"
-                )
-                session.add(log_entry)
-                session.commit()
+            # Log as a system event
+            _enqueue_system_log(
+                "INFO",
+                "schema_discovery",
+                "Schema discovery completed for %s tables",
+                (schema.get("summary", {}).get("total_tables", 0),),
+                "schema_service",
+                "discover_schema"
+            )
                 
         except Exception as e:
             self.logger.warning(f"Failed to log schema discovery: {str(e)}")
@@ -281,59 +450,64 @@ class SchemaService:
     def _log_query_mapping(self, query: str, mapping_result: Dict[str, Any]):
         """Log query mapping for analytics"""
         try:
-            from .database_manager import get_database_manager
-            db_manager = get_database_manager()
-            with db_manager.get_session() as session:
-                # Log as a system event
-                from ..models.database_models import SystemLog
-                confidence = mapping_result.get("confidence", 0.0)
-                log_entry = SystemLog(
-                    level="INFO",
-                    logger_name="query_mapping",
-                    message=f"Query mapped with confidence {confidence:.2f}: {query[:100]}",
-                    module="schema_service",
-                    function="map_query_to_schema"
-                )
-                session.add(log_entry)
-                session.commit()
+            # Log as a system event; %.100s truncates the query when the message is built
+            _enqueue_system_log(
+                "INFO",
+                "query_mapping",
+                "Query mapped with confidence %.2f: %.100s",
+                (mapping_result.get("confidence", 0.0), query),
+                "schema_service",
+                "map_query_to_schema"
+            )
                 
         except Exception as e:
             self.logger.warning(f"Failed to log query mapping: {str(e)}")
     
-    def _calculate_complexity_score(self, tables: Dict, relationships: List) -> str:
+    def _calculate_complexity_score(self, tables: Dict, relationships: List, total_columns: Optional[int] = None) -> str:
         """Calculate schema complexity score"""
         total_tables = len(tables)
         total_relationships = len(relationships)
         
-        # Calculate average columns per table
-        total_columns = sum(len(table.get("columns", {})) for table in tables.values())
-        avg_columns = total_columns / total_tables if total_tables > 0 else 0
+        # Calculate average columns per table, reusing the caller's count when it has one
+        if total_columns is None:
+            total_columns = sum(len(table.get("columns", {})) for table in tables.values())
         
-        # Calculate complexity score
-        complexity_score = (total_tables * 0.3 + total_relationships * 0.4 + avg_columns * 0.3)
+        # Complexity score is tables * 0.3 + relationships * 0.4 + avg_columns * 0.3;
+        # compare it scaled by 10 * total_tables to stay in exact integer arithmetic
+        if total_tables > 0:
+            scaled_score = 3 * total_tables * total_tables + 4 * total_relationships * total_tables + 3 * total_columns
+            scale = total_tables
+        else:
+            scaled_score = 4 * total_relationships
+            scale = 1
         
-        if complexity_score < 10:
+        if scaled_score < 100 * scale:
             return "simple"
-        elif complexity_score < 30:
+        elif scaled_score < 300 * scale:
             return "moderate"
         else:
             return "complex"
     
     def _generate_connection_hash(self, connection_string: str) -> str:
         """Generate hash for connection string"""
-        import hashlib
-        return hashlib.sha256(connection_string.encode()).hexdigest()
+        return connection_hash(connection_string)
     
     def _get_timestamp(self) -> str:
         """Get current timestamp"""
-        from datetime import datetime
         return datetime.utcnow().isoformat()
     
     def get_schema_visualization_data(self, connection_string: str) -> Dict[str, Any]:
         """Get data for frontend schema visualization"""
         try:
-            schema = self.discover_schema(connection_string)
+            return self._build_visualization(self.discover_schema(connection_string))
             
+        except Exception as e:
+            self.logger.error(f"Failed to get visualization data: {str(e)}")
+            return {"error": str(e)}
+    
+    def _build_visualization(self, schema: Mapping[str, Any]) -> Dict[str, Any]:
+        """Build frontend visualization data for an already discovered schema"""
+        try:
             # Prepare visualization data
             tables = schema.get("tables", {})
             relationships = schema.get("relationships", [])
@@ -370,7 +544,7 @@ class SchemaService:
                 "nodes": table_nodes,
                 "edges": relationship_edges,
                 "summary": schema.get("summary", {}),
-                "statistics": self.get_schema_statistics(connection_string)
+                "statistics": self._compute_statistics(schema)
             }
             
         except Exception as e:
@@ -379,10 +553,10 @@ class SchemaService:
     
     # Wrapper methods for backward compatibility with tests
     def get_schema_info(self, connection_string: str = None) -> Dict[str, Any]:
-        """Wrapper for discover_schema (backward compatibility)"""
+        """Copy of the discovered schema that the caller is free to modify"""
         if connection_string is None:
             return {"error": "connection_string is required"}
-        return self.discover_schema(connection_string)
+        return copy.deepcopy(self.discover_schema(connection_string))
     
     def get_schema_visualization(self, connection_string: str = None) -> Dict[str, Any]:
         """Wrapper for get_schema_visualization_data (backward compatibility)"""
@@ -395,10 +569,10 @@ class SchemaService:
         return self.mapper.map_query_to_schema(query, schema_info)
     
     def refresh_schema(self, connection_string: str = None) -> Dict[str, Any]:
-        """Wrapper for discover_schema with force_refresh (backward compatibility)"""
+        """Rediscover the schema and return a copy of it (backward compatibility)"""
         if connection_string is None:
             return {"error": "connection_string is required"}
-        return self.discover_schema(connection_string, force_refresh=True)
+        return copy.deepcopy(self.discover_schema(connection_string, force_refresh=True))
     
     def export_schema(self, connection_string: str = None, format: str = "json") -> Dict[str, Any]:
         """Export schema in specified format (backward compatibility)"""
@@ -408,7 +582,7 @@ class SchemaService:
         schema = self.discover_schema(connection_string)
         
         if format == "json":
-            return schema
+            return copy.deepcopy(schema)
         elif format == "summary":
             return self.get_schema_summary(connection_string)
         else:
@@ -416,6 +590,7 @@ class SchemaService:
 
 # Global schema service instance
 schema_service: Optional[SchemaService] = None
+_schema_service_lock = threading.Lock()
 
 def get_schema_service() -> SchemaService:
     """Get the global schema service instance"""
@@ -424,8 +599,13 @@ def get_schema_service() -> SchemaService:
     return schema_service
 
 def initialize_schema_service() -> SchemaService:
-    """Initialize the global schema service"""
+    """Initialize the global schema service, or return it if it already is"""
     global schema_service
-    schema_service = SchemaService()
-    schema_service.initialize()
+    # Startup and a first request may race to initialize; only one does
+    with _schema_service_lock:
+        if schema_service is None:
+            service = SchemaService()
+            service.initialize()
+            _start_log_writer()
+            schema_service = service
     return schema_service
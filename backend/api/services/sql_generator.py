@@ -2,19 +2,390 @@
 Natural Language to SQL Generation
 Convert natural language queries to SQL using Mistral API and schema mapping
 """
+import functools
+import hashlib
 import logging
 import re
-from typing import Dict, List, Any, Optional, Tuple
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Any, Optional, Tuple
 from datetime import datetime
 import json
+import numpy as np
+import orjson
 
 from .mistral_client import get_mistral_client
+from .database_manager import get_database_manager
 from .database_utils import get_database_utils
 from .redis_service import get_redis_service
 from .schema_service import get_schema_service
+from .document_processor import get_document_processor
 
 logger = logging.getLogger(__name__)
 
+_JSON_DECODER = json.JSONDecoder()
+_TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
+_SELECT_STATEMENT_RE = re.compile(r'SELECT.*?(?=\n|$)', re.IGNORECASE | re.DOTALL)
+_CONFIDENCE_RE = re.compile(r'confidence[:\s]*([0-9.]+)', re.IGNORECASE)
+_FROM_TABLE_RE = re.compile(r'FROM\s+(\w+)', re.IGNORECASE)
+_JOIN_TABLE_RE = re.compile(r'JOIN\s+(\w+)', re.IGNORECASE)
+_SELECT_COLUMNS_RE = re.compile(r'SELECT\s+(.*?)\s+FROM', re.IGNORECASE)
+_SELECT_START_RE = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+_LIMIT_RE = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+# SQL keywords that must not appear in generated queries, matched in one pass
+_DANGEROUS_PATTERNS = [
+    "DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "CREATE",
+    "TRUNCATE", "EXEC", "EXECUTE", "UNION", "INFORMATION_SCHEMA"
+]
+_DANGEROUS_RE = re.compile("|".join(re.escape(pattern) for pattern in _DANGEROUS_PATTERNS))
+
+# SQL injection patterns, checked together in one search; the individual
+# patterns are only consulted to name the one that matched. Each pattern is
+# matched with an equivalent that avoids nested .* backtracking, so crafted
+# input cannot make the check polynomially slow
+_INJECTION_PATTERNS = [
+    (r"'.*'.*'.*", r"'[^'\n]*'[^'\n]*'"),  # Quote manipulation
+    (r"--", r"--"),  # SQL comments
+    (r"\/\*.*\*\/", r"/\*.*\*/"),  # Block comments
+    (r"UNION.*SELECT", r"UNION.*SELECT"),  # Union attacks
+    (r"OR.*1.*=.*1", r"OR[^1\n]*1[^=\n]*=[^1\n]*1"),  # Always true conditions
+]
+_INJECTION_RES = [(pattern, re.compile(linear, re.IGNORECASE)) for pattern, linear in _INJECTION_PATTERNS]
+_INJECTION_RE = re.compile("|".join(linear for _, linear in _INJECTION_PATTERNS), re.IGNORECASE)
+
+# Semantic cache: how many recent generations are kept for paraphrase lookups,
+# and the cosine similarity a new query needs to reuse one of them
+_SEMANTIC_CACHE_MAX = 512
+_SEMANTIC_CACHE_THRESHOLD = 0.93
+
+def _normalize_query(query: str) -> str:
+    """Normalize a natural language query so trivially different phrasings share a cache key"""
+    return " ".join(query.lower().split()).rstrip(".?!")
+
+# Literals in a natural language query (quoted strings and numbers) and in SQL
+# (single-quoted strings, with '' escapes, and numbers); digits inside
+# identifiers such as table2 are not at a word boundary and are left alone
+_QUERY_LITERAL_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"|\b(\d+(?:\.\d+)?)\b")
+_SQL_LITERAL_RE = re.compile(r"'((?:[^']|'')*)'|\b(\d+(?:\.\d+)?)\b")
+_DEFAULT_LIMIT_SUFFIX = " LIMIT 1000"
+
+def _canonicalize(query: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Split a natural language query into a literal-free template and its literals
+    
+    "employees earning over 50000" and "employees earning over 60000" share the
+    template "employees earning over <num>"; the literals come back as
+    ("num", "50000") / ("str", "Sales") params in order of appearance.
+    """
+    params = []
+    
+    def placeholder(match):
+        if match.group(3) is not None:
+            params.append(("num", match.group(3)))
+            return "<num>"
+        params.append(("str", match.group(1) if match.group(1) is not None else match.group(2)))
+        return "<str>"
+    
+    template = _normalize_query(_QUERY_LITERAL_RE.sub(placeholder, query))
+    return template, params
+
+# Capitalized words, which name an entity (a department, a person, ...) unless
+# they start the query
+_NAME_TOKEN_RE = re.compile(r"\b[A-Z][\w&-]*")
+
+def _literal_signature(query: str) -> Tuple[Tuple[Tuple[str, str], ...], FrozenSet[str]]:
+    """
+    What two queries must share for one to reuse the other's SQL by meaning
+    
+    "employees earning over 50000" and "... over 60000", or "in Engineering"
+    and "in Marketing", embed almost identically, so paraphrases only match
+    when their literals (see _canonicalize) and their unquoted capitalized
+    name tokens are identical.
+    """
+    _, params = _canonicalize(query)
+    unquoted = _QUERY_LITERAL_RE.sub(" ", query).split(None, 1)
+    names = _NAME_TOKEN_RE.findall(unquoted[1]) if len(unquoted) > 1 else []
+    return tuple(params), frozenset(name.lower() for name in names)
+
+def _sql_literal(match) -> Tuple[str, str]:
+    """Param for a _SQL_LITERAL_RE match, comparable with _canonicalize params"""
+    if match.group(2) is not None:
+        return ("num", match.group(2))
+    return ("str", match.group(1).replace("''", "'"))
+
+def _split_default_limit(result: Dict[str, Any]) -> Tuple[str, str]:
+    """Split the LIMIT appended by _optimize_sql off a result's SQL"""
+    sql = result.get("sql") or ""
+    if result.get("optimized") and sql.endswith(_DEFAULT_LIMIT_SUFFIX):
+        return sql[:-len(_DEFAULT_LIMIT_SUFFIX)], _DEFAULT_LIMIT_SUFFIX
+    return sql, ""
+
+def _is_templatable(result: Dict[str, Any], params: List[Tuple[str, str]]) -> bool:
+    """
+    Whether a result's SQL can be re-materialized for other literals
+    
+    Only when the SQL's literals are exactly the query's (distinct) literals;
+    SQL carrying derived values, such as the year after a requested year,
+    would otherwise be replayed with stale literals.
+    """
+    if not params or len(set(params)) != len(params):
+        return False
+    sql, _ = _split_default_limit(result)
+    return sorted(map(_sql_literal, _SQL_LITERAL_RE.finditer(sql))) == sorted(params)
+
+def _rematerialize(result: Dict[str, Any], cached_params: List[Tuple[str, str]], params: List[Tuple[str, str]]) -> Optional[str]:
+    """Substitute a query's literals into the SQL cached for the same template"""
+    if [kind for kind, _ in cached_params] != [kind for kind, _ in params]:
+        return None
+    substitutions = dict(zip(cached_params, params))
+    
+    def substitute(match):
+        kind, value = substitutions[_sql_literal(match)]
+        if kind == "num":
+            return value
+        return "'" + value.replace("'", "''") + "'"
+    
+    sql, limit_suffix = _split_default_limit(result)
+    try:
+        return _SQL_LITERAL_RE.sub(substitute, sql) + limit_suffix
+    except KeyError:
+        return None
+
+@dataclass
+class _SemanticEntry:
+    """An earlier generation that close paraphrases of its query may reuse"""
+    query: str
+    embedding: Optional[np.ndarray]
+    match_key: Tuple[str, str, Any]
+    cache_key: str
+
+# Fields of a SQL generation result kept in the cache; the model's reasoning
+# prose and the timestamp are dropped and re-attached on a hit
+_CACHE_FIELDS = (
+    "sql", "confidence", "tables_used", "columns_used", "query_type",
+    "security_valid", "schema_valid", "validation_errors", "optimized", "error"
+)
+
+def _cache_entry(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Essential fields of a SQL generation result, as stored in the cache"""
+    return {key: value for key, value in result.items() if key in _CACHE_FIELDS}
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    """
+    Whether a SQL generation result may be cached
+    
+    Pattern-based fallbacks and unparsed responses stand in for SQL Mistral
+    failed to provide, and must not be served once it answers again.
+    """
+    return bool(result.get("sql")) and not result.get("error") and not result.get("fallback")
+
+def _from_cache_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """SQL generation result rebuilt from a cache entry"""
+    entry["reasoning"] = "cache hit"
+    entry["timestamp"] = datetime.utcnow().isoformat()
+    return entry
+
+def _schema_to_ddl(schema_info: Dict[str, Any]) -> Optional[str]:
+    """
+    Render a schema as compact DDL-like lines for the SQL generation prompt
+    
+    One line per table, e.g. "employees(id INTEGER, name VARCHAR) -- Employee
+    information", followed by one "a.x -> b.y" line per relationship. Returns
+    None when the schema has a shape these lines cannot express, in which case
+    the prompt falls back to JSON.
+    """
+    tables = schema_info.get("tables")
+    if not isinstance(tables, dict) or not tables:
+        return None
+    
+    lines = []
+    for table_name, table_info in tables.items():
+        if not isinstance(table_info, dict):
+            return None
+        
+        columns = table_info.get("columns", [])
+        if isinstance(columns, dict):
+            column_defs = []
+            for column_name, column_info in columns.items():
+                if not isinstance(column_info, dict):
+                    return None
+                column_type = column_info.get("type")
+                column_defs.append(f"{column_name} {column_type}" if column_type else str(column_name))
+        elif isinstance(columns, list) and all(isinstance(column, str) for column in columns):
+            column_defs = columns
+        else:
+            return None
+        
+        line = f"{table_name}({', '.join(column_defs)})"
+        purpose = table_info.get("purpose")
+        description = purpose.get("primary_purpose") if isinstance(purpose, dict) else table_info.get("description")
+        if description:
+            line += f" -- {description}"
+        lines.append(line)
+    
+    for relationship in schema_info.get("relationships") or []:
+        if not isinstance(relationship, dict):
+            return None
+        if "from" in relationship:
+            lines.append(f"{relationship['from']} -> {relationship.get('to')}")
+        else:
+            source_columns = ", ".join(relationship.get("source_columns") or [])
+            target_columns = ", ".join(relationship.get("target_columns") or [])
+            lines.append(
+                f"{relationship.get('source_table')}.{source_columns} -> "
+                f"{relationship.get('target_table')}.{target_columns}"
+            )
+    
+    return "\n".join(lines)
+
+def _compile_schema_validator(schema_info: Dict[str, Any]):
+    """
+    Build a SQL schema validator specialized to one schema
+    
+    The schema's table and column names are baked into the returned closure
+    as frozensets, so validating a statement does no schema dict lookups.
+    The closure takes a SQL string and returns the list of schema errors.
+    """
+    available_columns = {
+        table_name: frozenset(column for column in table_info.get("columns", []) if isinstance(column, str))
+        for table_name, table_info in schema_info.get("tables", {}).items()
+    }
+    from_search = _FROM_TABLE_RE.search
+    join_findall = _JOIN_TABLE_RE.findall
+    select_search = _SELECT_COLUMNS_RE.search
+    
+    def validate(sql: str) -> List[str]:
+        errors = []
+        
+        # Check that the FROM and JOIN tables exist
+        from_match = from_search(sql)
+        tables_used = [from_match.group(1)] if from_match else []
+        tables_used.extend(join_findall(sql))
+        for table in tables_used:
+            if table not in available_columns:
+                errors.append(f"Table '{table}' not found in schema")
+        
+        # Check that qualified SELECT columns exist in their tables
+        select_match = select_search(sql)
+        if select_match and select_match.group(1) != "*":
+            for column in select_match.group(1).split(","):
+                table, dot, col = column.strip().partition(".")
+                if dot and table in available_columns and col not in available_columns[table]:
+                    errors.append(f"Column '{col}' not found in table '{table}'")
+        
+        return errors
+    
+    return validate
+
+def _guarded(message: str, default: Any = None):
+    """
+    Decorator for SQLGenerator methods that log and swallow failures
+    
+    A failing method logs "<message>: <error>" with its traceback and returns
+    default, or a fresh default() when it is callable (e.g. list).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                self.logger.exception("%s: %s", message, e)
+                return default() if callable(default) else default
+        return wrapper
+    return decorator
+
+# Number of schemas whose derived values (serialized JSON, lookups) are memoized
+_SCHEMA_MEMO_MAX = 8
+
+# Keywords that decide the query type in pattern-based SQL generation, in priority order
+_QUERY_TYPE_KEYWORDS = (
+    ("COUNT", ("how many", "count", "total", "number of")),
+    ("AGGREGATE", ("average", "sum", "max", "min", "avg")),
+    ("GROUP_BY", ("group by", "by department", "by position")),
+)
+
+# Column name fragments that mark a column as numeric in pattern-based SQL generation
+_NUMERIC_COLUMN_KEYWORDS = ("salary", "id", "count", "number", "amount")
+
+# Schema used when the schema service cannot provide one
+_BASIC_SCHEMA_INFO = {
+    "tables": {
+        "employees": {
+            "columns": ["id", "name", "email", "department", "position", "salary", "hire_date"],
+            "description": "Employee information table"
+        },
+        "departments": {
+            "columns": ["id", "name", "description", "manager_id"],
+            "description": "Department information table"
+        }
+    },
+    "relationships": [
+        {"from": "employees.department", "to": "departments.id", "type": "foreign_key"}
+    ]
+}
+
+# Static part of the SQL generation prompt; the schema, query and user context follow it
+_SQL_PROMPT_INSTRUCTIONS = """
+You are an expert SQL generator for an employee database system. Convert the natural language query given after the database schema to SQL.
+
+Requirements:
+1. Generate valid SQL that follows the schema
+2. Use appropriate table and column names from the schema
+3. Include proper WHERE clauses for filtering
+4. Use appropriate SQL functions (COUNT, SUM, AVG, MAX, MIN)
+5. Include proper JOINs when needed
+6. Ensure the query is safe and read-only
+7. Do not include DROP, DELETE, UPDATE, INSERT, or other dangerous operations
+
+Please respond with a JSON object containing:
+- sql: The generated SQL query
+- confidence: Float between 0.0 and 1.0 indicating generation confidence
+- reasoning: Brief explanation of the SQL generation
+- tables_used: List of tables used in the query
+- columns_used: List of columns used in the query
+- query_type: Type of query (SELECT, COUNT, AGGREGATE, etc.)
+
+Examples:
+- "How many employees do we have?" → SELECT COUNT(*) FROM employees
+- "Show me all employees in Engineering" → SELECT * FROM employees WHERE department = 'Engineering'
+- "Average salary by department" → SELECT department, AVG(salary) FROM employees GROUP BY department
+
+Respond only with valid JSON.
+
+Database Schema:
+"""
+
+def _repair_json(text: str) -> str:
+    """
+    Best-effort repair of truncated or sloppy LLM JSON: closes an unterminated
+    string and any open brackets, and drops trailing commas
+    """
+    closers = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            closers.append("}")
+        elif char == "[":
+            closers.append("]")
+        elif char in "}]" and closers:
+            closers.pop()
+    
+    repaired = text + '"' if in_string else text
+    repaired = repaired.rstrip().rstrip(",") + "".join(reversed(closers))
+    return _TRAILING_COMMA_RE.sub(r"\1", repaired)
+
 class SQLGenerator:
     """Natural language to SQL generation using Mistral API"""
     
@@ -24,6 +395,15 @@ class SQLGenerator:
         self.db_utils = None
         self.redis_service = None
         self.schema_service = None
+        self.document_processor = None
+        
+        # Recent generations, embedded only once a query could match them
+        self._semantic_cache = deque(maxlen=_SEMANTIC_CACHE_MAX)
+        self._semantic_cache_lock = threading.Lock()
+        
+        # Values derived from recently used schemas, see _schema_memo
+        self._schema_memos = OrderedDict()
+        self._schema_memo_lock = threading.Lock()
         
         # SQL generation patterns
         self.sql_patterns = {
@@ -55,10 +435,7 @@ class SQLGenerator:
         }
         
         # SQL security patterns to avoid
-        self.dangerous_patterns = [
-            "DROP", "DELETE", "UPDATE", "INSERT", "ALTER", "CREATE",
-            "TRUNCATE", "EXEC", "EXECUTE", "UNION", "INFORMATION_SCHEMA"
-        ]
+        self.dangerous_patterns = _DANGEROUS_PATTERNS
     
     def initialize(self):
         """Initialize the SQL generator"""
@@ -70,7 +447,7 @@ class SQLGenerator:
             self.schema_service = get_schema_service()
             
             self.logger.info("SQL generator initialized successfully")
-            
+        
         except Exception as e:
             self.logger.error(f"Failed to initialize SQL generator: {str(e)}")
             raise
@@ -83,7 +460,7 @@ class SQLGenerator:
             query: Natural language query
             schema_info: Optional schema information
             user_context: Optional user context
-            
+        
         Returns:
             SQL generation result with query, confidence, and metadata
         """
@@ -91,29 +468,53 @@ class SQLGenerator:
             self.logger.info(f"Generating SQL for query: {query[:100]}...")
             
             # Check cache first
-            cache_key = f"sql_generation:{hash(query)}"
+            context = self._cache_context(schema_info, user_context)
+            cache_key = self._generate_cache_key(query, context)
             cached_result = self._get_cached_sql(cache_key)
             if cached_result:
                 self.logger.info("Using cached SQL generation result")
                 return cached_result
             
+            # Then for SQL cached for the same query with different literals
+            template, params = _canonicalize(query)
+            template_key = self._generate_template_key(template, context) if params else None
+            if template_key:
+                cached_result = self._get_template_cached_sql(template_key, params)
+                if cached_result:
+                    self.logger.info("Using template cached SQL generation result")
+                    return cached_result
+            
             # Get schema information if not provided
             if not schema_info:
                 schema_info = self._get_schema_info()
             
+            # Then look for a cached generation of a close paraphrase
+            match_key = (context, self._detect_query_type(query.lower()), _literal_signature(query))
+            if self.redis_service:
+                cached_result = self._get_semantic_cached_sql(query, match_key, schema_info)
+                if cached_result:
+                    self.logger.info("Using semantically cached SQL generation result")
+                    return cached_result
+            
             # Generate SQL using Mistral API
             sql_result = self._generate_sql_with_mistral(query, schema_info, user_context)
             
             # Validate and optimize SQL
             validated_result = self._validate_and_optimize_sql(sql_result, schema_info)
             
-            # Cache result
-            self._cache_sql(cache_key, validated_result)
+            # Cache result, unless it is a stand-in for SQL Mistral could not provide
+            if _is_cacheable(validated_result):
+                self._cache_sql(cache_key, validated_result)
+                if template_key:
+                    self._cache_sql_template(template_key, params, validated_result)
+                if self.redis_service:
+                    with self._semantic_cache_lock:
+                        self._semantic_cache.append(_SemanticEntry(_normalize_query(query), None, match_key, cache_key))
             
             self.logger.info(f"SQL generated successfully: {validated_result['sql'][:100]}...")
             
             return validated_result
-            
+        
         except Exception as e:
             self.logger.error(f"SQL generation failed: {str(e)}")
             return {
@@ -124,6 +525,122 @@ class SQLGenerator:
                 "timestamp": datetime.utcnow().isoformat()
             }
     
+    def _generate_cache_key(self, query: str, context: str) -> str:
+        """
+        Build a process-independent cache key for a SQL generation request
+        
+        Args:
+            query: Natural language query
+            context: Schema version and user role, see _cache_context
+        
+        Returns:
+            Cache key derived from a SHA-256 of the normalized query and its context
+        """
+        key_input = f"{_normalize_query(query)}\x00{context}"
+        digest = hashlib.sha256(key_input.encode("utf-8")).hexdigest()
+        return f"sql_generation:v1:{digest}"
+    
+    def _generate_template_key(self, template: str, context: str) -> str:
+        """Cache key shared by queries that only differ in their literals"""
+        digest = hashlib.sha256(f"{template}\x00{context}".encode("utf-8")).hexdigest()
+        return f"sql_template:v1:{digest}"
+    
+    def _cache_context(self, schema_info: Optional[Dict[str, Any]] = None, user_context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Schema version and user role that a cached generation is only valid for
+        
+        The version is the discovery time of the given schema or, without one,
+        of the current schema of the database SQL is generated for, so cached
+        SQL for a schema stops being served once it is rediscovered.
+        """
+        schema_version = schema_info.get("discovered_at") if schema_info else self._schema_version()
+        role = (user_context or {}).get("role") or ""
+        return f"{schema_version or ''}\x00{role}"
+    
+    def _schema_version(self) -> str:
+        """Discovery time of the application database's current schema, or "" when it is unknown"""
+        if not self.schema_service:
+            return ""
+        try:
+            return self.schema_service.get_schema_version(get_database_manager().database_url) or ""
+        except Exception as e:
+            self.logger.warning(f"Failed to get schema version for SQL cache: {str(e)}")
+            return ""
+    
+    def _embed_queries(self, queries: List[str]) -> Optional[np.ndarray]:
+        """Embed normalized queries as unit row vectors, or None when no embedding model is available"""
+        try:
+            if self.document_processor is None:
+                self.document_processor = get_document_processor()
+            if not self.document_processor.embedding_model:
+                return None
+            
+            embeddings = np.asarray(self.document_processor.embedding_model.encode(queries), dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            return embeddings / np.where(norms == 0, 1, norms)
+        
+        except RuntimeError:
+            # Document processor not initialized, so there is no model to embed with
+            return None
+        except Exception as e:
+            self.logger.warning(f"Failed to embed queries for semantic cache: {str(e)}")
+            return None
+    
+    def _get_semantic_cached_sql(self, query: str, match_key: Tuple[str, str, Any], schema_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached generation of the closest earlier paraphrase of a query
+        
+        Only generations with the same schema version, user role, detected
+        query type and literals are considered, so "total salary" never
+        reuses the SQL of "average salary", nor "over 50000" that of "over
+        60000", however close their embeddings are. Nothing is embedded
+        unless such a generation exists.
+        
+        Args:
+            query: Natural language query
+            match_key: Cache context, query type and _literal_signature of the query
+            schema_info: Schema the reused SQL must still validate against
+        
+        Returns:
+            Cached SQL generation result or None
+        """
+        try:
+            with self._semantic_cache_lock:
+                entries = [entry for entry in self._semantic_cache if entry.match_key == match_key]
+            if not entries:
+                return None
+            
+            # Embed the query together with candidates not embedded yet, in one pass
+            pending = [entry for entry in entries if entry.embedding is None]
+            embeddings = self._embed_queries([_normalize_query(query)] + [entry.query for entry in pending])
+            if embeddings is None:
+                return None
+            for entry, embedding in zip(pending, embeddings[1:]):
+                entry.embedding = embedding
+            
+            # Embeddings are unit vectors, so the dot product is the cosine similarity
+            similarities = np.stack([entry.embedding for entry in entries]) @ embeddings[0]
+            best = int(np.argmax(similarities))
+            if similarities[best] <= _SEMANTIC_CACHE_THRESHOLD:
+                return None
+            
+            cached_result = self._get_cached_sql(entries[best].cache_key)
+            if not cached_result or not self._validate_sql_schema(cached_result.get("sql", ""), schema_info)["valid"]:
+                return None
+            
+            # Lowercase names slip past the signature; the SQL's string literals
+            # must still all come from this query
+            query_lower = query.lower()
+            for kind, value in map(_sql_literal, _SQL_LITERAL_RE.finditer(cached_result.get("sql", ""))):
+                if kind == "str" and value.lower() not in query_lower:
+                    return None
+            
+            return cached_result
+        
+        except Exception as e:
+            self.logger.error(f"Failed to get semantically cached SQL: {str(e)}")
+            return None
+    
     def _get_schema_info(self) -> Dict[str, Any]:
         """Get database schema information"""
         try:
@@ -134,28 +651,14 @@ class SQLGenerator:
             else:
                 # Fallback to basic schema info
                 return self._get_basic_schema_info()
-                
+        
         except Exception as e:
             self.logger.error(f"Failed to get schema info: {str(e)}")
             return self._get_basic_schema_info()
     
     def _get_basic_schema_info(self) -> Dict[str, Any]:
         """Get basic schema information as fallback"""
-        return {
-            "tables": {
-                "employees": {
-                    "columns": ["id", "name", "email", "department", "position", "salary", "hire_date"],
-                    "description": "Employee information table"
-                },
-                "departments": {
-                    "columns": ["id", "name", "description", "manager_id"],
-                    "description": "Department information table"
-                }
-            },
-            "relationships": [
-                {"from": "employees.department", "to": "departments.id", "type": "foreign_key"}
-            ]
-        }
+        return _BASIC_SCHEMA_INFO
     
     def _generate_sql_with_mistral(self, query: str, schema_info: Dict[str, Any], user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate SQL using Mistral API"""
@@ -167,13 +670,16 @@ class SQLGenerator:
             prompt = self._create_sql_generation_prompt(query, schema_info, user_context)
             
             # Get Mistral API response
-            response = self.mistral_client.generate_response(prompt)
+            llm_response = self.mistral_client.generate_response(prompt)
+            if not llm_response.get("success"):
+                raise RuntimeError(llm_response.get("error", "Mistral request failed"))
+            response = llm_response.get("content", "")
             
             # Parse response
             sql_result = self._parse_mistral_sql_response(response)
             
             return sql_result
-            
+        
         except Exception as e:
             self.logger.error(f"Mistral API SQL generation failed: {str(e)}")
             # Fallback to pattern-based SQL generation
@@ -181,53 +687,60 @@ class SQLGenerator:
     
     def _create_sql_generation_prompt(self, query: str, schema_info: Dict[str, Any], user_context: Optional[Dict[str, Any]] = None) -> str:
         """Create prompt for Mistral API SQL generation"""
-        prompt = f"""
-You are an expert SQL generator for an employee database system. Convert the following natural language query to SQL.
-
-Database Schema:
-{json.dumps(schema_info, indent=2)}
-
-Natural Language Query: "{query}"
-
-Requirements:
-1. Generate valid SQL that follows the schema
-2. Use appropriate table and column names from the schema
-3. Include proper WHERE clauses for filtering
-4. Use appropriate SQL functions (COUNT, SUM, AVG, MAX, MIN)
-5. Include proper JOINs when needed
-6. Ensure the query is safe and read-only
-7. Do not include DROP, DELETE, UPDATE, INSERT, or other dangerous operations
-
-Please respond with a JSON object containing:
-- sql: The generated SQL query
-- confidence: Float between 0.0 and 1.0 indicating generation confidence
-- reasoning: Brief explanation of the SQL generation
-- tables_used: List of tables used in the query
-- columns_used: List of columns used in the query
-- query_type: Type of query (SELECT, COUNT, AGGREGATE, etc.)
-
-Examples:
-- "How many employees do we have?" → SELECT COUNT(*) FROM employees
-- "Show me all employees in Engineering" → SELECT * FROM employees WHERE department = 'Engineering'
-- "Average salary by department" → SELECT department, AVG(salary) FROM employees GROUP BY department
-
-Respond only with valid JSON.
-"""
+        # Everything up to and including the schema is identical for every query
+        # against the same schema, so the API can reuse its prefix cache
+        memo = self._schema_memo(schema_info)
+        prompt_schema = memo.get("prompt_schema")
+        if prompt_schema is None:
+            # Compact DDL lines take far fewer tokens than the JSON schema
+            prompt_schema = memo["prompt_schema"] = (
+                _schema_to_ddl(schema_info) or json.dumps(schema_info, indent=2, sort_keys=True)
+            )
+        
+        prompt = (
+            _SQL_PROMPT_INSTRUCTIONS
+            + prompt_schema
+            + f'\n\nNatural Language Query: "{query}"\n'
+        )
         
         if user_context:
             prompt += f"\nUser Context: {json.dumps(user_context)}"
         
         return prompt
     
+    def _schema_memo(self, schema_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the memo of values derived from a schema
+        
+        Discovered schemas are keyed by their discovery time and any other
+        schema by identity (the memo holds a reference, so the id stays
+        unique), so derived values are computed once per schema rather than
+        once per query.
+        
+        Args:
+            schema_info: Schema information
+        
+        Returns:
+            Mutable dict of derived values for this schema
+        """
+        version = schema_info.get("discovered_at")
+        key = version or id(schema_info)
+        with self._schema_memo_lock:
+            entry = self._schema_memos.get(key)
+            if entry is None or (not version and entry[0] is not schema_info):
+                entry = self._schema_memos[key] = (schema_info, {})
+                if len(self._schema_memos) > _SCHEMA_MEMO_MAX:
+                    self._schema_memos.popitem(last=False)
+            else:
+                self._schema_memos.move_to_end(key)
+            return entry[1]
+    
     def _parse_mistral_sql_response(self, response: str) -> Dict[str, Any]:
         """Parse Mistral API response for SQL generation"""
         try:
             # Try to extract JSON from response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                result = json.loads(json_str)
-                
+            result = self._extract_json_object(response)
+            if result is not None:
                 # Validate required fields
                 required_fields = ['sql', 'confidence', 'reasoning', 'tables_used', 'columns_used', 'query_type']
                 for field in required_fields:
@@ -238,35 +751,69 @@ Respond only with valid JSON.
             else:
                 # Fallback parsing
                 return self._parse_sql_text_response(response)
-                
+        
         except Exception as e:
             self.logger.error(f"Failed to parse Mistral SQL response: {str(e)}")
             return self._get_default_sql_result()
     
+    def _extract_json_object(self, response: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract the JSON object from an LLM response, tolerating surrounding
+        text, trailing commas and truncated output
+        
+        Args:
+            response: LLM response text
+        
+        Returns:
+            Parsed object, or None if no object could be recovered
+        """
+        start = response.find('{')
+        if start == -1:
+            return None
+        
+        candidates = []
+        end = response.rfind('}')
+        if end > start:
+            candidates.append(lambda: orjson.loads(response[start:end + 1]))
+        # The first complete object, when text after it contains braces too
+        candidates.append(lambda: _JSON_DECODER.raw_decode(response, start)[0])
+        candidates.append(lambda: orjson.loads(_repair_json(response[start:])))
+        
+        for candidate in candidates:
+            try:
+                result = candidate()
+            except ValueError:
+                continue
+            if isinstance(result, dict):
+                return result
+        
+        self.logger.warning("Could not recover JSON from Mistral SQL response")
+        return None
+    
     def _parse_sql_text_response(self, response: str) -> Dict[str, Any]:
         """Parse text response when JSON parsing fails"""
         try:
             # Extract SQL query
             sql_query = ""
-            sql_match = re.search(r'SELECT.*?(?=\n|$)', response, re.IGNORECASE | re.DOTALL)
+            sql_match = _SELECT_STATEMENT_RE.search(response)
             if sql_match:
                 sql_query = sql_match.group().strip()
             
             # Extract confidence
             confidence = 0.5
-            confidence_match = re.search(r'confidence[:\s]*([0-9.]+)', response, re.IGNORECASE)
+            confidence_match = _CONFIDENCE_RE.search(response)
             if confidence_match:
                 confidence = float(confidence_match.group(1))
             
             # Extract tables used
             tables_used = []
-            table_match = re.search(r'FROM\s+(\w+)', sql_query, re.IGNORECASE)
+            table_match = _FROM_TABLE_RE.search(sql_query)
             if table_match:
                 tables_used.append(table_match.group(1))
             
             # Extract columns used
             columns_used = []
-            column_matches = re.findall(r'SELECT\s+(.*?)\s+FROM', sql_query, re.IGNORECASE)
+            column_matches = _SELECT_COLUMNS_RE.findall(sql_query)
             if column_matches:
                 columns = [col.strip() for col in column_matches[0].split(',')]
                 columns_used.extend(columns)
@@ -279,7 +826,7 @@ Respond only with valid JSON.
                 "columns_used": columns_used,
                 "query_type": "SELECT"
             }
-            
+        
         except Exception as e:
             self.logger.error(f"Failed to parse SQL text response: {str(e)}")
             return self._get_default_sql_result()
@@ -292,7 +839,8 @@ Respond only with valid JSON.
             "reasoning": "Failed to parse response",
             "tables_used": [],
             "columns_used": [],
-            "query_type": "SELECT"
+            "query_type": "SELECT",
+            "fallback": True
         }
     
     def _get_default_sql_value(self, field: str) -> Any:
@@ -310,16 +858,8 @@ Respond only with valid JSON.
     def _fallback_sql_generation(self, query: str, schema_info: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback pattern-based SQL generation when Mistral API fails"""
         try:
-            query_lower = query.lower()
-            
             # Determine query type
-            query_type = "SELECT"
-            if any(pattern in query_lower for pattern in ["how many", "count", "total", "number of"]):
-                query_type = "COUNT"
-            elif any(pattern in query_lower for pattern in ["average", "sum", "max", "min", "avg"]):
-                query_type = "AGGREGATE"
-            elif any(pattern in query_lower for pattern in ["group by", "by department", "by position"]):
-                query_type = "GROUP_BY"
+            query_type = self._detect_query_type(query.lower())
             
             # Generate basic SQL
             sql_query = self._generate_basic_sql(query, schema_info, query_type)
@@ -334,13 +874,22 @@ Respond only with valid JSON.
                 "reasoning": f"Pattern-based SQL generation for {query_type} query",
                 "tables_used": tables_used,
                 "columns_used": columns_used,
-                "query_type": query_type
+                "query_type": query_type,
+                "fallback": True
             }
-            
+        
         except Exception as e:
             self.logger.error(f"Fallback SQL generation failed: {str(e)}")
             return self._get_default_sql_result()
     
+    def _detect_query_type(self, query_lower: str) -> str:
+        """Detect the query type of a lowercased natural language query from keyword patterns"""
+        contains = query_lower.__contains__
+        for query_type, keywords in _QUERY_TYPE_KEYWORDS:
+            if any(map(contains, keywords)):
+                return query_type
+        return "SELECT"
+    
     def _generate_basic_sql(self, query: str, schema_info: Dict[str, Any], query_type: str) -> str:
         """Generate basic SQL query"""
         try:
@@ -363,55 +912,52 @@ Respond only with valid JSON.
                     return f"SELECT COUNT(*) FROM {main_table}"
             else:
                 return f"SELECT * FROM {main_table} LIMIT 10"
-                
+        
         except Exception as e:
             self.logger.error(f"Basic SQL generation failed: {str(e)}")
             return "SELECT 1"
     
+    @_guarded("Failed to find numeric columns", default=list)
     def _find_numeric_columns(self, schema_info: Dict[str, Any]) -> List[str]:
-        """Find numeric columns in schema"""
-        numeric_columns = []
-        for table_name, table_info in schema_info.get("tables", {}).items():
-            for column in table_info.get("columns", []):
-                if any(numeric_type in column.lower() for numeric_type in ["salary", "id", "count", "number", "amount"]):
-                    numeric_columns.append(f"{table_name}.{column}")
+        """Find numeric columns in schema, computed once per schema"""
+        memo = self._schema_memo(schema_info)
+        numeric_columns = memo.get("numeric_columns")
+        if numeric_columns is None:
+            numeric_columns = memo["numeric_columns"] = [
+                f"{table_name}.{column}"
+                for table_name, table_info in schema_info.get("tables", {}).items()
+                for column in table_info.get("columns", [])
+                if any(map(column.lower().__contains__, _NUMERIC_COLUMN_KEYWORDS))
+            ]
         return numeric_columns
     
+    @_guarded("Failed to extract tables from SQL", default=list)
     def _extract_tables_from_sql(self, sql: str) -> List[str]:
         """Extract table names from SQL query"""
-        try:
-            tables = []
-            # Find FROM clause
-            from_match = re.search(r'FROM\s+(\w+)', sql, re.IGNORECASE)
-            if from_match:
-                tables.append(from_match.group(1))
-            
-            # Find JOIN clauses
-            join_matches = re.findall(r'JOIN\s+(\w+)', sql, re.IGNORECASE)
-            tables.extend(join_matches)
-            
-            return tables
-            
-        except Exception as e:
-            self.logger.error(f"Failed to extract tables from SQL: {str(e)}")
-            return []
+        tables = []
+        # Find FROM clause
+        from_match = _FROM_TABLE_RE.search(sql)
+        if from_match:
+            tables.append(from_match.group(1))
+        
+        # Find JOIN clauses
+        join_matches = _JOIN_TABLE_RE.findall(sql)
+        tables.extend(join_matches)
+        
+        return tables
     
+    @_guarded("Failed to extract columns from SQL", default=list)
     def _extract_columns_from_sql(self, sql: str) -> List[str]:
         """Extract column names from SQL query"""
-        try:
-            columns = []
-            # Find SELECT clause
-            select_match = re.search(r'SELECT\s+(.*?)\s+FROM', sql, re.IGNORECASE)
-            if select_match:
-                select_clause = select_match.group(1)
-                if select_clause != "*":
-                    columns = [col.strip() for col in select_clause.split(',')]
-            
-            return columns
-            
-        except Exception as e:
-            self.logger.error(f"Failed to extract columns from SQL: {str(e)}")
-            return []
+        columns = []
+        # Find SELECT clause
+        select_match = _SELECT_COLUMNS_RE.search(sql)
+        if select_match:
+            select_clause = select_match.group(1)
+            if select_clause != "*":
+                columns = [col.strip() for col in select_clause.split(',')]
+        
+        return columns
     
     def _validate_and_optimize_sql(self, sql_result: Dict[str, Any], schema_info: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and optimize generated SQL"""
@@ -443,7 +989,7 @@ Respond only with valid JSON.
                 sql_result["optimized"] = True
             
             return sql_result
-            
+        
         except Exception as e:
             self.logger.error(f"SQL validation and optimization failed: {str(e)}")
             sql_result["error"] = str(e)
@@ -454,32 +1000,24 @@ Respond only with valid JSON.
         try:
             sql_upper = sql.upper()
             
-            # Check for dangerous patterns
-            for pattern in self.dangerous_patterns:
-                if pattern in sql_upper:
-                    return {
-                        "safe": False,
-                        "reason": f"Dangerous SQL pattern detected: {pattern}"
-                    }
+            # Check for dangerous patterns; on a hit, report the first one in list order
+            if _DANGEROUS_RE.search(sql_upper):
+                pattern = next(pattern for pattern in self.dangerous_patterns if pattern in sql_upper)
+                return {
+                    "safe": False,
+                    "reason": f"Dangerous SQL pattern detected: {pattern}"
+                }
             
             # Check for SQL injection patterns
-            injection_patterns = [
-                r"'.*'.*'.*",  # Quote manipulation
-                r"--",  # SQL comments
-                r"\/\*.*\*\/",  # Block comments
-                r"UNION.*SELECT",  # Union attacks
-                r"OR.*1.*=.*1",  # Always true conditions
-            ]
-            
-            for pattern in injection_patterns:
-                if re.search(pattern, sql, re.IGNORECASE):
-                    return {
-                        "safe": False,
-                        "reason": f"Potential SQL injection pattern detected: {pattern}"
-                    }
+            if _INJECTION_RE.search(sql):
+                pattern = next(pattern for pattern, regex in _INJECTION_RES if regex.search(sql))
+                return {
+                    "safe": False,
+                    "reason": f"Potential SQL injection pattern detected: {pattern}"
+                }
             
             return {"safe": True, "reason": "SQL appears safe"}
-            
+        
         except Exception as e:
             self.logger.error(f"SQL security validation failed: {str(e)}")
             return {"safe": False, "reason": f"Security validation error: {str(e)}"}
@@ -487,35 +1025,20 @@ Respond only with valid JSON.
     def _validate_sql_schema(self, sql: str, schema_info: Dict[str, Any]) -> Dict[str, Any]:
         """Validate SQL against database schema"""
         try:
-            errors = []
-            
-            # Extract tables from SQL
-            tables_used = self._extract_tables_from_sql(sql)
-            available_tables = list(schema_info.get("tables", {}).keys())
+            # Validator specialized to this schema, built once per schema
+            memo = self._schema_memo(schema_info)
+            validator = memo.get("validator")
+            if validator is None:
+                validator = memo["validator"] = _compile_schema_validator(schema_info)
             
-            # Check if tables exist
-            for table in tables_used:
-                if table not in available_tables:
-                    errors.append(f"Table '{table}' not found in schema")
-            
-            # Extract columns from SQL
-            columns_used = self._extract_columns_from_sql(sql)
-            
-            # Check if columns exist in their tables
-            for column in columns_used:
-                if "." in column:
-                    table, col = column.split(".", 1)
-                    if table in schema_info.get("tables", {}):
-                        available_columns = schema_info["tables"][table].get("columns", [])
-                        if col not in available_columns:
-                            errors.append(f"Column '{col}' not found in table '{table}'")
+            errors = validator(sql)
             
             return {
                 "valid": len(errors) == 0,
                 "errors": errors,
                 "reason": "Schema validation completed"
             }
-            
+        
         except Exception as e:
             self.logger.error(f"SQL schema validation failed: {str(e)}")
             return {
@@ -527,49 +1050,84 @@ Respond only with valid JSON.
     def _optimize_sql(self, sql: str) -> str:
         """Optimize SQL query for better performance"""
         try:
-            # Basic optimizations
-            optimized = sql.strip()
-            
-            # Remove extra whitespace
-            optimized = re.sub(r'\s+', ' ', optimized)
+            # Strip and collapse whitespace in one pass; str.split() splits on the
+            # same whitespace characters as \s
+            optimized = " ".join(sql.split())
             
             # Add LIMIT if not present and it's a SELECT query
-            if optimized.upper().startswith('SELECT') and 'LIMIT' not in optimized.upper():
+            if _SELECT_START_RE.match(optimized) and not _LIMIT_RE.search(optimized):
                 optimized += ' LIMIT 1000'  # Add reasonable limit
             
             return optimized
-            
+        
         except Exception as e:
             self.logger.error(f"SQL optimization failed: {str(e)}")
             return sql
     
+    @_guarded("Failed to get cached SQL", default=None)
     def _get_cached_sql(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """Get cached SQL generation result"""
+        if not self.redis_service:
+            return None
+        
+        # Stored as a msgpack-encoded dict by RedisService
+        cached_result = self.redis_service.get_cache(cache_key)
+        if isinstance(cached_result, dict):
+            return _from_cache_entry(cached_result)
+        
+        return None
+    
+    @_guarded("Failed to cache SQL", default=None)
+    def _cache_sql(self, cache_key: str, result: Dict[str, Any]):
+        """Cache SQL generation result"""
+        if not self.redis_service:
+            return
+        
+        # Cache for 2 hours
+        self.redis_service.set_cache(cache_key, _cache_entry(result), 7200)
+    
+    def _get_template_cached_sql(self, template_key: str, params: List[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+        """Get SQL cached for the query's template, re-materialized with its literals"""
         try:
             if not self.redis_service:
                 return None
             
-            cached_result = self.redis_service.get(cache_key)
-            if cached_result:
-                return json.loads(cached_result)
+            cached = self.redis_service.get_cache(template_key)
+            if not isinstance(cached, dict) or not isinstance(cached.get("result"), dict):
+                return None
             
-            return None
+            cached_params = [tuple(param) for param in cached.get("params", [])]
+            if len(cached_params) != len(params):
+                return None
+            
+            result = cached["result"]
+            sql = _rematerialize(result, cached_params, params)
             
+            # Substituted literals are quoted, but still must not trip the security checks
+            if sql is None or not self._validate_sql_security(sql)["safe"]:
+                return None
+            
+            result["sql"] = sql
+            return _from_cache_entry(result)
+        
         except Exception as e:
-            self.logger.error(f"Failed to get cached SQL: {str(e)}")
+            self.logger.error(f"Failed to get template cached SQL: {str(e)}")
             return None
     
-    def _cache_sql(self, cache_key: str, result: Dict[str, Any]):
-        """Cache SQL generation result"""
+    def _cache_sql_template(self, template_key: str, params: List[Tuple[str, str]], result: Dict[str, Any]):
+        """Cache a valid SQL generation result for re-use with other literals"""
         try:
-            if not self.redis_service:
+            if not self.redis_service or result.get("error") or not result.get("security_valid"):
                 return
             
-            # Cache for 2 hours
-            self.redis_service.set(cache_key, json.dumps(result), expire=7200)
+            if not _is_templatable(result, params):
+                return
             
+            # Cache for 2 hours
+            self.redis_service.set_cache(template_key, {"params": params, "result": _cache_entry(result)}, 7200)
+        
         except Exception as e:
-            self.logger.error(f"Failed to cache SQL: {str(e)}")
+            self.logger.error(f"Failed to cache SQL template: {str(e)}")
     
     def execute_sql(self, sql: str, limit: int = 1000) -> Dict[str, Any]:
         """Execute SQL query and return results"""
@@ -578,7 +1136,7 @@ Respond only with valid JSON.
                 raise ValueError("Database utils not initialized")
             
             # Add LIMIT if not present
-            if 'LIMIT' not in sql.upper():
+            if not _LIMIT_RE.search(sql):
                 sql += f' LIMIT {limit}'
             
             # Execute query
@@ -591,7 +1149,7 @@ Respond only with valid JSON.
                 "sql": sql,
                 "timestamp": datetime.utcnow().isoformat()
             }
-            
+        
         except Exception as e:
             self.logger.error(f"SQL execution failed: {str(e)}")
             return {
@@ -603,6 +1161,7 @@ Respond only with valid JSON.
 
 # Global SQL generator instance
 sql_generator: Optional[SQLGenerator] = None
+_sql_generator_lock = threading.Lock()
 
 def get_sql_generator() -> SQLGenerator:
     """Get the global SQL generator instance"""
@@ -611,8 +1170,12 @@ def get_sql_generator() -> SQLGenerator:
     return sql_generator
 
 def initialize_sql_generator() -> SQLGenerator:
-    """Initialize the global SQL generator"""
+    """Initialize the global SQL generator, or return it if it already is"""
     global sql_generator
-    sql_generator = SQLGenerator()
-    sql_generator.initialize()
+    # Startup and a first request may race to initialize; only one does
+    with _sql_generator_lock:
+        if sql_generator is None:
+            generator = SQLGenerator()
+            generator.initialize()
+            sql_generator = generator
     return sql_generator
@@ -1,9 +1,12 @@
 """
 Configuration management for the NLP Query Engine
 """
+import atexit
 import os
+import queue
 from typing import Optional
 import logging
+import logging.handlers
 
 class Settings:
     """Application settings and configuration"""
@@ -13,6 +16,8 @@ class Settings:
     
     # Redis Configuration
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_POOL_SIZE: int = int(os.getenv("REDIS_POOL_SIZE", "50"))
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", "1.0"))
     
     # ChromaDB Configuration
     CHROMA_URL: str = os.getenv("CHROMA_URL", "http://localhost:8001")
@@ -26,11 +31,21 @@ class Settings:
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_FILE_MAX_BYTES: int = int(os.getenv("LOG_FILE_MAX_BYTES", "10485760"))  # 10MB
+    LOG_FILE_BACKUP_COUNT: int = int(os.getenv("LOG_FILE_BACKUP_COUNT", "5"))
     
     # Performance Configuration
     MAX_CONCURRENT_QUERIES: int = int(os.getenv("MAX_CONCURRENT_QUERIES", "10"))
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "300"))
     BATCH_SIZE: int = int(os.getenv("BATCH_SIZE", "32"))
+    # Each worker process keeps its own in-memory caches (schema L1, query
+    # responses, semantic SQL index) that other workers never invalidate,
+    # and its own copy of the embedding model. With more than one worker,
+    # logs go to stdout only
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # int8 embeddings drift from the fp32 vectors already stored in ChromaDB, so
+    # only enable this for a fresh store or after re-embedding the documents
+    EMBEDDING_QUANTIZE: bool = os.getenv("EMBEDDING_QUANTIZE", "false").lower() == "true"
     
     # File Upload Configuration
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
@@ -40,6 +55,9 @@ class Settings:
     ENABLE_METRICS: bool = os.getenv("ENABLE_METRICS", "true").lower() == "true"
     METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9090"))
 
+# Listener draining the logging queue, started once by setup_logging
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
 def setup_logging():
     """Configure application logging"""
     log_level = getattr(logging, Settings.LOG_LEVEL.upper(), logging.INFO)
@@ -69,15 +87,35 @@ def setup_logging():
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
     
-    # Configure root logger
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('app.log')
-        ]
-    )
+    # Configure root logger. Request threads only enqueue records; a listener
+    # thread does the console and file writes so slow disks never block them
+    global _log_listener
+    if _log_listener is None:
+        handler_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        handlers = [logging.StreamHandler()]
+        
+        # File rotation is not safe across processes, so several workers
+        # sharing app.log would lose or clobber log files
+        if Settings.WEB_CONCURRENCY == 1:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                'app.log',
+                maxBytes=Settings.LOG_FILE_MAX_BYTES,
+                backupCount=Settings.LOG_FILE_BACKUP_COUNT,
+                delay=True
+            ))
+        for handler in handlers:
+            handler.setFormatter(handler_formatter)
+        
+        # The queue handler only renders the message (and any traceback) so
+        # the listener's handlers format each record exactly once
+        log_queue = queue.Queue(-1)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        logging.basicConfig(level=log_level, handlers=[queue_handler])
+        
+        _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
     
     # Set specific loggers
     logging.getLogger("uvicorn").setLevel(logging.INFO)
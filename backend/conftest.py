@@ -0,0 +1,25 @@
+"""
+Shared pytest configuration for the backend test scripts
+"""
+import os
+import sys
+
+import pytest
+
+# Make the backend packages importable however pytest is invoked
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope="session")
+def initialized_services():
+    """Result of initializing the database services, once for the whole test run"""
+    from api.services.database_initializer import initialize_database_services
+    db_initializer = initialize_database_services()
+    yield db_initializer.initialize_all_services()
+    db_initializer.close_all_services()
+
+@pytest.fixture(scope="session")
+def document_processor():
+    """Document processor (and its embedding model) shared by the whole test run"""
+    # Imported lazily so tests/conftest.py can set up the test environment first
+    from api.services.document_processor import get_or_initialize_document_processor
+    return get_or_initialize_document_processor()
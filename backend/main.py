@@ -1,13 +1,19 @@
 """
 Main FastAPI application entry point for NLP Query Engine
 """
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from functools import lru_cache
+from typing import Optional
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
+import orjson
 import uvicorn
 from config import setup_logging, settings
-from api.services.database_initializer import initialize_database_services
-from api.services.health_monitor import initialize_health_monitor
+from api.services.database_initializer import initialize_database_services, get_database_initializer
+from api.services.health_monitor import initialize_health_monitor, get_health_monitor
 from api.services.schema_service import initialize_schema_service
 from api.services.document_processor import initialize_document_processor
 from api.services.query_classifier import initialize_query_classifier
@@ -19,10 +25,62 @@ from api.endpoints import schema_endpoints, document_endpoints, query_endpoints,
 # Setup logging
 logger = setup_logging()
 
+# Services initialized at startup, in dependency order: each wave only needs
+# services from earlier waves, so the services within a wave are initialized
+# concurrently (mostly blocking I/O and model loading, run in threads)
+SERVICE_INITIALIZATION_WAVES = [
+    [
+        ("schema service", initialize_schema_service),
+        ("document processor", initialize_document_processor),
+        ("query classifier", initialize_query_classifier),
+    ],
+    [
+        ("SQL generator", initialize_sql_generator),
+        ("document search engine", initialize_document_search_engine),
+    ],
+    [
+        ("hybrid query processor", initialize_hybrid_query_processor),
+    ],
+]
+
+async def initialize_services():
+    """Initialize the services that depend on the database services"""
+    for wave in SERVICE_INITIALIZATION_WAVES:
+        for name, _ in wave:
+            logger.info("Initializing %s...", name)
+        
+        results = await asyncio.gather(
+            *(asyncio.to_thread(initialize) for _, initialize in wave),
+            return_exceptions=True
+        )
+        
+        # Failures keep their traceback; the service initializes on first use
+        for (name, _), result in zip(wave, results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to initialize %s, deferring to first use", name, exc_info=result)
+            else:
+                logger.info("Initialized %s successfully", name)
+
+# Set once the services have been initialized in the background after startup
+READY = asyncio.Event()
+
+# Upper bound on closing database connections during shutdown
+SHUTDOWN_TIMEOUT_SECONDS = 5.0
+
+async def _deferred_init(ready: asyncio.Event):
+    """Initialize the services in the background, then mark the app ready"""
+    try:
+        await initialize_services()
+        ready.set()
+        logger.info("Services initialized, application ready")
+    except Exception as e:
+        logger.error("Deferred service initialization failed: %s", e)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
+    init_task = None
     try:
         logger.info("Initializing database services...")
         db_initializer = initialize_database_services()
@@ -36,69 +94,36 @@ async def lifespan(app: FastAPI):
             health_monitor = initialize_health_monitor()
             logger.info("Health monitoring initialized successfully")
             
-            # Initialize schema service
-            logger.info("Initializing schema service...")
-            try:
-                schema_service = initialize_schema_service()
-                logger.info("Schema service initialized successfully")
-            except Exception as e:
-                logger.warning(f"Schema service initialization failed: {str(e)}")
-                logger.info("Schema service will be initialized on first use")
-            
-            # Initialize document processor
-            logger.info("Initializing document processor...")
-            try:
-                document_processor = initialize_document_processor()
-                logger.info("Document processor initialized successfully")
-            except Exception as e:
-                logger.warning(f"Document processor initialization failed: {str(e)}")
-                logger.info("Document processor will be initialized on first use")
-            
-            # Initialize query services
-            logger.info("Initializing query services...")
-            try:
-                query_classifier = initialize_query_classifier()
-                logger.info("Query classifier initialized successfully")
-            except Exception as e:
-                logger.warning(f"Query classifier initialization failed: {str(e)}")
-                logger.info("Query classifier will be initialized on first use")
-            
-            try:
-                sql_generator = initialize_sql_generator()
-                logger.info("SQL generator initialized successfully")
-            except Exception as e:
-                logger.warning(f"SQL generator initialization failed: {str(e)}")
-                logger.info("SQL generator will be initialized on first use")
-            
-            try:
-                document_search_engine = initialize_document_search_engine()
-                logger.info("Document search engine initialized successfully")
-            except Exception as e:
-                logger.warning(f"Document search engine initialization failed: {str(e)}")
-                logger.info("Document search engine will be initialized on first use")
-            
-            try:
-                hybrid_query_processor = initialize_hybrid_query_processor()
-                logger.info("Hybrid query processor initialized successfully")
-            except Exception as e:
-                logger.warning(f"Hybrid query processor initialization failed: {str(e)}")
-                logger.info("Hybrid query processor will be initialized on first use")
+            # Initialize the remaining services (model loading, schema discovery)
+            # in the background so the app starts serving liveness probes at once
+            init_task = asyncio.create_task(_deferred_init(READY))
         else:
-            logger.error(f"Database services initialization failed: {result.get('error')}")
+            logger.error("Database services initialization failed: %s", result.get('error'))
             
     except Exception as e:
-        logger.error(f"Failed to initialize database services: {str(e)}")
+        logger.error("Failed to initialize database services: %s", e)
     
     yield
     
     # Shutdown
+    READY.clear()
+    _db_initializer.cache_clear()
+    _health_monitor.cache_clear()
+    if init_task is not None and not init_task.done():
+        init_task.cancel()
+    
     try:
-        from api.services.database_initializer import get_database_initializer
         db_initializer = get_database_initializer()
-        db_initializer.close_all_services()
+        closers = [asyncio.to_thread(db_initializer.close_all_services)]
+        if "redis" in db_initializer.services:
+            closers.append(db_initializer.services["redis"].ashutdown())
+        # Bound shutdown so a hung connection cannot outlive the grace period
+        await asyncio.wait_for(asyncio.gather(*closers), timeout=SHUTDOWN_TIMEOUT_SECONDS)
         logger.info("Database services closed")
+    except asyncio.TimeoutError:
+        logger.error("Closing database services timed out after %ss", SHUTDOWN_TIMEOUT_SECONDS)
     except Exception as e:
-        logger.error(f"Error closing database services: {str(e)}")
+        logger.error("Error closing database services: %s", e)
 
 app = FastAPI(
     title="NLP Query Engine for Employee Data",
@@ -112,82 +137,144 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],  # React dev server
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+# Compress the larger JSON payloads (health history, comprehensive status)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+def _json_response(content) -> Response:
+    """Serialize an untyped payload once with orjson, bypassing jsonable_encoder"""
+    return Response(
+        content=orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json"
+    )
+
+# Dependencies resolving the status singletons once rather than on every request
+@lru_cache(maxsize=1)
+def _db_initializer():
+    return get_database_initializer()
+
+@lru_cache(maxsize=1)
+def _health_monitor():
+    return get_health_monitor()
+
+def get_db_initializer_dependency():
+    """Dependency to get the database initializer"""
+    try:
+        return _db_initializer()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"Database services not available: {str(e)}")
+
+def get_health_monitor_dependency():
+    """Dependency to get the health monitor"""
+    try:
+        return _health_monitor()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"Health monitor not available: {str(e)}")
+
+# Bodies of the root and liveness endpoints never change, so they are
+# serialized once rather than on every (frequent) probe
+_ROOT_BODY = orjson.dumps({"message": "NLP Query Engine for Employee Data API"})
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "nlp-query-engine",
+    "version": "1.0.0",
+    "database_url": settings.DATABASE_URL,
+    "redis_url": settings.REDIS_URL,
+    "chroma_url": settings.CHROMA_URL
+})
+
+# Health and status probes, polled constantly by orchestrators and monitoring;
+# kept on their own router, ahead of the API routers and out of the OpenAPI schema
+probe_router = APIRouter(include_in_schema=False)
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    logger.info("Root endpoint accessed")
-    return {"message": "NLP Query Engine for Employee Data API"}
+    logger.debug("Root endpoint accessed")
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
-@app.get("/health")
+@probe_router.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    logger.info("Health check endpoint accessed")
-    return {
-        "status": "healthy", 
-        "service": "nlp-query-engine",
-        "version": "1.0.0",
-        "database_url": settings.DATABASE_URL,
-        "redis_url": settings.REDIS_URL,
-        "chroma_url": settings.CHROMA_URL
-    }
-
-@app.get("/database/status")
-async def database_status():
+    """Health check endpoint, also the liveness probe"""
+    logger.debug("Health check endpoint accessed")
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+@probe_router.get("/health/ready")
+async def readiness_check():
+    """Readiness check endpoint, 503 until the services are initialized"""
+    if not READY.is_set():
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True}
+
+@probe_router.get("/database/status")
+async def database_status(db_initializer = Depends(get_db_initializer_dependency)):
     """Database services status endpoint"""
     try:
-        from api.services.database_initializer import get_database_initializer
-        db_initializer = get_database_initializer()
-        status = db_initializer.get_service_status()
-        return status
+        status = await asyncio.to_thread(db_initializer.get_service_status)
+        return _json_response(status)
     except Exception as e:
-        logger.error(f"Failed to get database status: {str(e)}")
+        logger.error("Failed to get database status: %s", e)
         return {"status": "error", "error": str(e)}
 
-@app.get("/health/comprehensive")
-async def comprehensive_health():
+@probe_router.get("/health/comprehensive")
+async def comprehensive_health(health_monitor = Depends(get_health_monitor_dependency)):
     """Comprehensive health check endpoint"""
     try:
-        from api.services.health_monitor import get_health_monitor
-        health_monitor = get_health_monitor()
-        health_status = health_monitor.get_comprehensive_health_status()
-        return health_status
+        health_status = await asyncio.to_thread(health_monitor.get_comprehensive_health_status)
+        return _json_response(health_status)
     except Exception as e:
-        logger.error(f"Failed to get comprehensive health status: {str(e)}")
+        logger.error("Failed to get comprehensive health status: %s", e)
         return {"status": "error", "error": str(e)}
 
-@app.get("/health/alerts")
-async def health_alerts():
+@probe_router.get("/health/alerts")
+async def health_alerts(health_monitor = Depends(get_health_monitor_dependency)):
     """Health alerts endpoint"""
     try:
-        from api.services.health_monitor import get_health_monitor
-        health_monitor = get_health_monitor()
-        alerts = health_monitor.check_alerts()
-        return {"alerts": alerts, "count": len(alerts)}
+        alerts = await asyncio.to_thread(health_monitor.check_alerts)
+        return _json_response({"alerts": alerts, "count": len(alerts)})
     except Exception as e:
-        logger.error(f"Failed to get health alerts: {str(e)}")
+        logger.error("Failed to get health alerts: %s", e)
         return {"status": "error", "error": str(e)}
 
-@app.get("/health/history")
-async def health_history(hours: int = 24):
-    """Health monitoring history endpoint"""
+@probe_router.get("/health/history")
+async def health_history(
+    hours: int = 24,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of metrics to return"),
+    offset: int = Query(0, ge=0, description="Number of metrics to skip"),
+    health_monitor = Depends(get_health_monitor_dependency)
+):
+    """Health monitoring history endpoint, paged with limit/offset"""
     try:
-        from api.services.health_monitor import get_health_monitor
-        health_monitor = get_health_monitor()
-        history = health_monitor.get_health_history(hours)
-        return {"history": history, "hours": hours}
+        history = await asyncio.to_thread(health_monitor.get_health_history, hours, limit, offset)
+        return _json_response({"history": history, "hours": hours, "limit": limit, "offset": offset})
     except Exception as e:
-        logger.error(f"Failed to get health history: {str(e)}")
+        logger.error("Failed to get health history: %s", e)
         return {"status": "error", "error": str(e)}
 
-# Include API routers
+# Include probe and API routers
+app.include_router(probe_router)
 app.include_router(ingestion_endpoints.router)
 app.include_router(schema_endpoints.router)
 app.include_router(document_endpoints.router)
 app.include_router(query_endpoints.router)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Multiple workers need the app as an import string; uvicorn[standard]
+    # picks the uvloop event loop and httptools parser when available.
+    # log_config=None leaves uvicorn's loggers propagating to the root
+    # logger's queue handler instead of installing their own stream handlers
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=settings.WEB_CONCURRENCY,
+        log_level="warning",
+        log_config=None,
+        access_log=False
+    )
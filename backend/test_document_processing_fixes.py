@@ -5,29 +5,22 @@ Test script for document processing fixes
 import sys
 import os
 import logging
+import tempfile
 from pathlib import Path
 
-# Add the backend directory to the Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
 from api.services.document_processor import get_or_initialize_document_processor
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def test_document_processing_fixes():
+def test_document_processing_fixes(document_processor, tmp_path):
     """Test document processing with fixes"""
     try:
         logger.info("Testing document processing fixes...")
         
-        # Initialize document processor
-        logger.info("Initializing document processor...")
-        document_processor = get_or_initialize_document_processor()
-        logger.info("Document processor initialized successfully")
-        
         # Test with a simple text file
-        test_file = "test_fixes.txt"
+        test_file = tmp_path / "test_fixes.txt"
         test_content = """
         Test Document for Processing Fixes
         
@@ -45,43 +38,37 @@ def test_document_processing_fixes():
         """
         
         # Create test file
-        with open(test_file, 'w', encoding='utf-8') as f:
-            f.write(test_content)
+        test_file.write_text(test_content, encoding='utf-8')
         
-        logger.info(f"Created test file: {test_file}")
+        logger.info("Created test file: %s", test_file)
         
         # Process the document
         logger.info("Processing test document...")
-        result = document_processor.process_single_document(test_file)
+        result = document_processor.process_single_document(str(test_file))
         
         if result["success"]:
             logger.info("Document processing successful!")
-            logger.info(f"Document ID: {result['document_id']}")
-            logger.info(f"Document Type: {result['doc_type']}")
-            logger.info(f"Chunks Count: {result['chunks_count']}")
+            logger.info("Document ID: %s", result['document_id'])
+            logger.info("Document Type: %s", result['doc_type'])
+            logger.info("Chunks Count: %s", result['chunks_count'])
             
             # Test document search
             logger.info("Testing document search...")
             search_results = document_processor.search_documents("Python development", limit=5)
-            logger.info(f"Found {len(search_results)} search results")
+            logger.info("Found %s search results", len(search_results))
             
             for i, result in enumerate(search_results[:3]):
-                logger.info(f"Result {i+1}: {result['metadata'].get('chunk_type', 'unknown')} - {result['text'][:100]}...")
+                logger.info("Result %s: %s - %s...", i+1, result['metadata'].get('chunk_type', 'unknown'), result['text'][:100])
             
         else:
-            logger.error(f"Document processing failed: {result.get('error', 'Unknown error')}")
+            logger.error("Document processing failed: %s", result.get('error', 'Unknown error'))
             return False
         
-        # Clean up
-        if os.path.exists(test_file):
-            os.remove(test_file)
-            logger.info("Cleaned up test file")
-        
         logger.info("Document processing fixes test completed successfully!")
         return True
         
     except Exception as e:
-        logger.error(f"Test failed: {str(e)}")
+        logger.error("Test failed: %s", e)
         return False
 
 if __name__ == "__main__":
@@ -89,7 +76,8 @@ if __name__ == "__main__":
     print("Document Processing Fixes Test")
     print("=" * 60)
     
-    success = test_document_processing_fixes()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        success = test_document_processing_fixes(get_or_initialize_document_processor(), Path(tmp_dir))
     
     print(f"\nTest result: {'PASSED' if success else 'FAILED'}")
     sys.exit(0 if success else 1)
@@ -5,30 +5,24 @@ Test script for embedding model initialization
 import sys
 import os
 import logging
+import tempfile
 from pathlib import Path
 
-# Add the backend directory to the Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
 from api.services.document_processor import get_or_initialize_document_processor
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def test_embedding_initialization():
+def test_embedding_initialization(document_processor, tmp_path):
     """Test embedding model initialization"""
     try:
         logger.info("Testing embedding model initialization...")
         
-        # Test lazy initialization
-        logger.info("Testing lazy initialization of document processor...")
-        document_processor = get_or_initialize_document_processor()
-        
         # Check if embedding model is initialized
         if document_processor.embedding_model:
             logger.info("Embedding model is initialized successfully!")
-            logger.info(f"Model type: {type(document_processor.embedding_model)}")
+            logger.info("Model type: %s", type(document_processor.embedding_model))
             
             # Test embedding generation
             logger.info("Testing embedding generation...")
@@ -36,8 +30,8 @@ def test_embedding_initialization():
             embeddings = document_processor._generate_embeddings([{"text": test_text}])
             
             if embeddings and len(embeddings) > 0:
-                logger.info(f"Embedding generation successful! Generated {len(embeddings)} embeddings")
-                logger.info(f"Embedding dimension: {len(embeddings[0])}")
+                logger.info("Embedding generation successful! Generated %s embeddings", len(embeddings))
+                logger.info("Embedding dimension: %s", len(embeddings[0]))
             else:
                 logger.error("Embedding generation failed")
                 return False
@@ -48,7 +42,7 @@ def test_embedding_initialization():
         
         # Test document processing with a simple text file
         logger.info("Testing document processing...")
-        test_file = "test_embedding.txt"
+        test_file = tmp_path / "test_embedding.txt"
         test_content = """
         Test Document for Embedding
         
@@ -61,33 +55,27 @@ def test_embedding_initialization():
         """
         
         # Create test file
-        with open(test_file, 'w', encoding='utf-8') as f:
-            f.write(test_content)
+        test_file.write_text(test_content, encoding='utf-8')
         
-        logger.info(f"Created test file: {test_file}")
+        logger.info("Created test file: %s", test_file)
         
         # Process the document
-        result = document_processor.process_single_document(test_file)
+        result = document_processor.process_single_document(str(test_file))
         
         if result["success"]:
             logger.info("Document processing successful!")
-            logger.info(f"Document ID: {result['document_id']}")
-            logger.info(f"Document Type: {result['doc_type']}")
-            logger.info(f"Chunks Count: {result['chunks_count']}")
+            logger.info("Document ID: %s", result['document_id'])
+            logger.info("Document Type: %s", result['doc_type'])
+            logger.info("Chunks Count: %s", result['chunks_count'])
         else:
-            logger.error(f"Document processing failed: {result.get('error', 'Unknown error')}")
+            logger.error("Document processing failed: %s", result.get('error', 'Unknown error'))
             return False
         
-        # Clean up
-        if os.path.exists(test_file):
-            os.remove(test_file)
-            logger.info("Cleaned up test file")
-        
         logger.info("Embedding initialization test completed successfully!")
         return True
         
     except Exception as e:
-        logger.error(f"Test failed: {str(e)}")
+        logger.error("Test failed: %s", e)
         return False
 
 def test_embedding_model_loading():
@@ -95,7 +83,7 @@ def test_embedding_model_loading():
     try:
         logger.info("Testing different embedding models...")
         
-        from sentence_transformers import SentenceTransformer
+        from api.services.document_processor import load_embedding_model
         
         models_to_test = [
             'all-MiniLM-L6-v2',
@@ -105,23 +93,23 @@ def test_embedding_model_loading():
         
         for model_name in models_to_test:
             try:
-                logger.info(f"Testing model: {model_name}")
-                model = SentenceTransformer(model_name)
+                logger.info("Testing model: %s", model_name)
+                model = load_embedding_model(model_name)
                 
                 # Test encoding
                 test_texts = ["This is a test", "Another test document"]
                 embeddings = model.encode(test_texts)
                 
-                logger.info(f"Model {model_name} loaded successfully!")
-                logger.info(f"Generated {len(embeddings)} embeddings with dimension {len(embeddings[0])}")
+                logger.info("Model %s loaded successfully!", model_name)
+                logger.info("Generated %s embeddings with dimension %s", len(embeddings), len(embeddings[0]))
                 
             except Exception as e:
-                logger.warning(f"Model {model_name} failed: {str(e)}")
+                logger.warning("Model %s failed: %s", model_name, e)
         
         return True
         
     except Exception as e:
-        logger.error(f"Model testing failed: {str(e)}")
+        logger.error("Model testing failed: %s", e)
         return False
 
 if __name__ == "__main__":
@@ -130,7 +118,9 @@ if __name__ == "__main__":
     print("=" * 60)
     
     # Test embedding initialization
-    success1 = test_embedding_initialization()
+    logger.info("Testing lazy initialization of document processor...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        success1 = test_embedding_initialization(get_or_initialize_document_processor(), Path(tmp_dir))
     
     print("\n" + "=" * 60)
     print("Embedding Model Loading Test")
@@ -7,9 +7,6 @@ import os
 import logging
 from pathlib import Path
 
-# Add the backend directory to the Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
 from api.services.mistral_client import get_mistral_client
 
 # Setup logging
@@ -54,7 +51,7 @@ def test_mistral_ocr():
         with open(test_image, 'w', encoding='utf-8') as f:
             f.write(test_content)
         
-        logger.info(f"Created test file: {test_image}")
+        logger.info("Created test file: %s", test_image)
         
         # Test 2: Test image OCR
         logger.info("Testing image OCR...")
@@ -62,37 +59,37 @@ def test_mistral_ocr():
             ocr_result = mistral_client.extract_text_from_image_ocr(test_image)
             
             if ocr_result["success"]:
-                logger.info(f"Image OCR successful!")
-                logger.info(f"Pages processed: {len(ocr_result['pages'])}")
-                logger.info(f"Text length: {len(ocr_result['extracted_text'])} characters")
-                logger.info(f"Model used: {ocr_result['model']}")
-                logger.info(f"Extracted text preview: {ocr_result['extracted_text'][:200]}...")
+                logger.info("Image OCR successful!")
+                logger.info("Pages processed: %s", len(ocr_result['pages']))
+                logger.info("Text length: %s characters", len(ocr_result['extracted_text']))
+                logger.info("Model used: %s", ocr_result['model'])
+                logger.info("Extracted text preview: %s...", ocr_result['extracted_text'][:200])
             else:
-                logger.error(f"Image OCR failed: {ocr_result.get('error', 'Unknown error')}")
+                logger.error("Image OCR failed: %s", ocr_result.get('error', 'Unknown error'))
                 return False
                 
         except Exception as e:
-            logger.error(f"Image OCR test failed: {str(e)}")
+            logger.error("Image OCR test failed: %s", e)
             return False
         
         # Test 3: Test PDF OCR (if you have a PDF file)
         pdf_file = "test_document.pdf"
         if os.path.exists(pdf_file):
-            logger.info(f"Testing PDF OCR with: {pdf_file}")
+            logger.info("Testing PDF OCR with: %s", pdf_file)
             try:
                 pdf_ocr_result = mistral_client.extract_text_from_pdf_ocr(pdf_file)
                 
                 if pdf_ocr_result["success"]:
-                    logger.info(f"PDF OCR successful!")
-                    logger.info(f"Pages processed: {len(pdf_ocr_result['pages'])}")
-                    logger.info(f"Text length: {len(pdf_ocr_result['extracted_text'])} characters")
-                    logger.info(f"Model used: {pdf_ocr_result['model']}")
-                    logger.info(f"Extracted text preview: {pdf_ocr_result['extracted_text'][:200]}...")
+                    logger.info("PDF OCR successful!")
+                    logger.info("Pages processed: %s", len(pdf_ocr_result['pages']))
+                    logger.info("Text length: %s characters", len(pdf_ocr_result['extracted_text']))
+                    logger.info("Model used: %s", pdf_ocr_result['model'])
+                    logger.info("Extracted text preview: %s...", pdf_ocr_result['extracted_text'][:200])
                 else:
-                    logger.warning(f"PDF OCR failed: {pdf_ocr_result.get('error', 'Unknown error')}")
+                    logger.warning("PDF OCR failed: %s", pdf_ocr_result.get('error', 'Unknown error'))
                     
             except Exception as e:
-                logger.warning(f"PDF OCR test failed: {str(e)}")
+                logger.warning("PDF OCR test failed: %s", e)
         else:
             logger.info("No PDF file found for testing, skipping PDF OCR test")
         
@@ -105,7 +102,7 @@ def test_mistral_ocr():
         return True
         
     except Exception as e:
-        logger.error(f"Test failed: {str(e)}")
+        logger.error("Test failed: %s", e)
         return False
 
 def test_mistral_ocr_with_different_models():
@@ -124,18 +121,14 @@ def test_mistral_ocr_with_different_models():
         with open(test_image, 'w', encoding='utf-8') as f:
             f.write(test_content)
         
-        for model in models_to_test:
-            try:
-                logger.info(f"Testing model: {model}")
-                result = mistral_client.extract_text_from_image_ocr(test_image, model=model)
-                
-                if result["success"]:
-                    logger.info(f"Model {model} successful: {len(result['extracted_text'])} characters")
-                else:
-                    logger.warning(f"Model {model} failed: {result.get('error', 'Unknown error')}")
-                    
-            except Exception as e:
-                logger.warning(f"Model {model} test failed: {str(e)}")
+        logger.info("Testing models: %s", ", ".join(models_to_test))
+        results = mistral_client.extract_text_from_image_ocr_batch(test_image, models_to_test)
+        
+        for model, result in results.items():
+            if result["success"]:
+                logger.info("Model %s successful: %s characters", model, len(result['extracted_text']))
+            else:
+                logger.warning("Model %s failed: %s", model, result.get('error', 'Unknown error'))
         
         # Clean up
         if os.path.exists(test_image):
@@ -144,7 +137,7 @@ def test_mistral_ocr_with_different_models():
         return True
         
     except Exception as e:
-        logger.error(f"Model testing failed: {str(e)}")
+        logger.error("Model testing failed: %s", e)
         return False
 
 def test_mistral_ocr_url():
@@ -158,7 +151,7 @@ def test_mistral_ocr_url():
         test_url = "https://example.com/sample-image.jpg"
         
         try:
-            logger.info(f"Testing URL OCR with: {test_url}")
+            logger.info("Testing URL OCR with: %s", test_url)
             result = mistral_client.extract_text_from_url_ocr(
                 url=test_url,
                 document_type="image_url",
@@ -166,21 +159,21 @@ def test_mistral_ocr_url():
             )
             
             if result["success"]:
-                logger.info(f"URL OCR successful!")
-                logger.info(f"Pages processed: {len(result['pages'])}")
-                logger.info(f"Text length: {len(result['extracted_text'])} characters")
-                logger.info(f"Model used: {result['model']}")
-                logger.info(f"Extracted text preview: {result['extracted_text'][:200]}...")
+                logger.info("URL OCR successful!")
+                logger.info("Pages processed: %s", len(result['pages']))
+                logger.info("Text length: %s characters", len(result['extracted_text']))
+                logger.info("Model used: %s", result['model'])
+                logger.info("Extracted text preview: %s...", result['extracted_text'][:200])
             else:
-                logger.warning(f"URL OCR failed: {result.get('error', 'Unknown error')}")
+                logger.warning("URL OCR failed: %s", result.get('error', 'Unknown error'))
                 
         except Exception as e:
-            logger.warning(f"URL OCR test failed: {str(e)}")
+            logger.warning("URL OCR test failed: %s", e)
         
         return True
         
     except Exception as e:
-        logger.error(f"URL testing failed: {str(e)}")
+        logger.error("URL testing failed: %s", e)
         return False
 
 if __name__ == "__main__":
@@ -328,6 +328,21 @@ class TestPerformanceOptimization:
             assert connection_time < 1.0  # Should complete within 1 second
             assert len(connections) == 20
     
+    def test_bulk_cache_pipelining(self, test_redis_service):
+        """Test bulk cache operations use a single pipelined round trip."""
+        with patch.object(test_redis_service, 'client') as mock_redis:
+            mock_pipe = mock_redis.pipeline.return_value
+            mock_pipe.execute.return_value = ['{"cached_data": "test"}'] * 50 + [None]
+            
+            keys = [f"test_key_{i}" for i in range(51)]
+            results = test_redis_service.mget_cache(keys)
+            
+            # All lookups should be queued on one pipeline and executed once
+            assert mock_pipe.get.call_count == 51
+            assert mock_pipe.execute.call_count == 1
+            assert results[0] == {"cached_data": "test"}
+            assert results[-1] is None
+    
     def test_batch_processing_performance(self, test_document_processor):
         """Test batch processing performance."""
         with patch.object(test_document_processor, 'embedding_model') as mock_model:
@@ -5,6 +5,8 @@ Test schema discovery and natural language mapping functionality
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 import json
+import threading
+import time
 
 from api.services.schema_service import SchemaService
 from api.services.dynamic_schema_discovery import DynamicSchemaDiscovery
@@ -123,6 +125,82 @@ class TestSchemaService:
             assert result is not None
             assert "tables" in result  # export returns the schema itself
             mock_discover.assert_called_once_with("sqlite:///test.db")
+    
+    def test_get_schema_info_returns_copy(self, test_schema_service, sample_database_schema):
+        """Test callers modifying the schema they get do not change the cached schema."""
+        test_schema_service._remember_schema("sqlite:///test.db", sample_database_schema)
+        
+        result = test_schema_service.get_schema_info("sqlite:///test.db")
+        result["tables"]["employees"]["columns"].clear()
+        
+        cached = test_schema_service.discover_schema("sqlite:///test.db")
+        assert len(cached["tables"]["employees"]["columns"]) == 7
+
+class TestSchemaDiscoverySingleFlight:
+    """Test cases for concurrent discovery of the same connection."""
+    
+    def test_concurrent_callers_discover_once(self, test_schema_service, sample_database_schema):
+        """Test concurrent callers share a single slow discovery."""
+        discovery = MagicMock()
+        
+        def slow_discover():
+            time.sleep(0.1)
+            return sample_database_schema
+        
+        discovery.return_value.discover_schema.side_effect = slow_discover
+        results = []
+        
+        with patch('api.services.schema_service.DynamicSchemaDiscovery', discovery):
+            threads = [
+                threading.Thread(target=lambda: results.append(test_schema_service.discover_schema("sqlite:///test.db")))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        assert discovery.return_value.discover_schema.call_count == 1
+        assert len(results) == 8
+        assert all(result is results[0] for result in results)
+    
+    def test_waiter_retries_after_failed_discovery(self, test_schema_service, sample_database_schema):
+        """Test a caller waiting on a failed discovery runs its own."""
+        discovery = MagicMock()
+        started = threading.Event()
+        release = threading.Event()
+        
+        def fail_first():
+            if not started.is_set():
+                started.set()
+                release.wait()
+                raise RuntimeError("connection lost")
+            return sample_database_schema
+        
+        discovery.return_value.discover_schema.side_effect = fail_first
+        errors = []
+        results = []
+        
+        def leader():
+            try:
+                test_schema_service.discover_schema("sqlite:///test.db")
+            except RuntimeError as e:
+                errors.append(e)
+        
+        with patch('api.services.schema_service.DynamicSchemaDiscovery', discovery):
+            leader_thread = threading.Thread(target=leader)
+            leader_thread.start()
+            started.wait()
+            waiter_thread = threading.Thread(target=lambda: results.append(test_schema_service.discover_schema("sqlite:///test.db")))
+            waiter_thread.start()
+            time.sleep(0.05)
+            release.set()
+            leader_thread.join()
+            waiter_thread.join()
+        
+        assert len(errors) == 1
+        assert results == [sample_database_schema]
+        assert discovery.return_value.discover_schema.call_count == 2
 
 class TestDynamicSchemaDiscovery:
     """Test cases for DynamicSchemaDiscovery."""
@@ -0,0 +1,281 @@
+"""
+Unit Tests for SQL Generator
+Test the SQL generation caches and response parsing
+"""
+import copy
+import pytest
+from unittest.mock import Mock, patch
+
+from api.services.sql_generator import (
+    SQLGenerator, _canonicalize, _is_templatable, _rematerialize, _repair_json, _split_default_limit
+)
+
+SCHEMA_INFO = {
+    "tables": {
+        "employees": {
+            "columns": ["id", "name", "department", "salary", "hire_date"],
+            "description": "Employee information table"
+        }
+    },
+    "discovered_at": "2024-01-01T00:00:00"
+}
+
+class FakeRedisService:
+    """In-memory stand-in for the RedisService cache calls."""
+    
+    def __init__(self):
+        self.store = {}
+    
+    def get_cache(self, key):
+        return copy.deepcopy(self.store.get(key))
+    
+    def set_cache(self, key, value, ttl=None):
+        self.store[key] = copy.deepcopy(value)
+        return True
+
+@pytest.fixture
+def sql_generator():
+    """SQL generator with an in-memory cache and an embedding model that finds every query alike."""
+    generator = SQLGenerator()
+    generator.redis_service = FakeRedisService()
+    generator.document_processor = Mock()
+    generator.document_processor.embedding_model.encode.side_effect = lambda texts: [[1.0, 0.0]] * len(texts)
+    return generator
+
+def generate(generator, query, sql):
+    """Run generate_sql with Mistral answering sql, and return (result, whether Mistral was asked)."""
+    with patch.object(generator, '_generate_sql_with_mistral') as mock_mistral:
+        mock_mistral.return_value = {"sql": sql, "confidence": 0.9, "reasoning": "generated"}
+        result = generator.generate_sql(query, SCHEMA_INFO)
+    return result, mock_mistral.called
+
+class TestSemanticCache:
+    """Test cases for reusing the SQL of paraphrased queries."""
+    
+    def test_paraphrase_with_same_literals_hits(self, sql_generator):
+        """Test a paraphrase with the same literals reuses the cached SQL."""
+        generate(sql_generator, "Employees earning over 50000", "SELECT * FROM employees WHERE salary > 50000")
+        
+        result, called = generate(sql_generator, "Staff paid more than 50000", "SELECT 1")
+        
+        assert not called
+        assert result["sql"].startswith("SELECT * FROM employees WHERE salary > 50000")
+    
+    def test_paraphrase_with_different_number_misses(self, sql_generator):
+        """Test a paraphrase with a different number does not reuse the cached SQL."""
+        generate(sql_generator, "Employees earning over 50000", "SELECT * FROM employees WHERE salary > 50000")
+        
+        result, called = generate(sql_generator, "Staff paid more than 60000", "SELECT * FROM employees WHERE salary > 60000")
+        
+        assert called
+        assert "60000" in result["sql"]
+    
+    def test_paraphrase_with_different_name_misses(self, sql_generator):
+        """Test a paraphrase naming a different department does not reuse the cached SQL."""
+        generate(sql_generator, "Show employees in Engineering", "SELECT * FROM employees WHERE department = 'Engineering'")
+        
+        result, called = generate(sql_generator, "List staff in Marketing", "SELECT * FROM employees WHERE department = 'Marketing'")
+        
+        assert called
+        assert "'Marketing'" in result["sql"]
+    
+    def test_paraphrase_with_different_lowercase_name_misses(self, sql_generator):
+        """Test a lowercase department name the cached SQL does not mention is not served that SQL."""
+        generate(sql_generator, "employees in engineering", "SELECT * FROM employees WHERE department = 'Engineering'")
+        
+        result, called = generate(sql_generator, "staff in marketing", "SELECT * FROM employees WHERE department = 'Marketing'")
+        
+        assert called
+        assert "'Marketing'" in result["sql"]
+    
+    def test_no_embedding_without_candidates(self, sql_generator):
+        """Test queries are only embedded once an earlier generation could match them."""
+        generate(sql_generator, "Employees earning over 50000", "SELECT * FROM employees WHERE salary > 50000")
+        generate(sql_generator, "Show employees in Engineering", "SELECT * FROM employees WHERE department = 'Engineering'")
+        
+        assert not sql_generator.document_processor.embedding_model.encode.called
+    
+    def test_paraphrase_with_different_leading_name_misses(self, sql_generator):
+        """Test a department name starting the query is not served another department's SQL."""
+        generate(sql_generator, "Engineering employees", "SELECT * FROM employees WHERE department = 'Engineering'")
+        
+        result, called = generate(sql_generator, "Marketing staff", "SELECT * FROM employees WHERE department = 'Marketing'")
+        
+        assert called
+        assert "'Marketing'" in result["sql"]
+
+class TestTemplateCache:
+    """Test cases for re-materializing cached SQL with a query's own literals."""
+    
+    def test_canonicalize_numbers_and_strings(self):
+        """Test numbers and quoted strings are replaced by placeholders in order."""
+        template, params = _canonicalize("Employees in 'Sales' earning over 50000")
+        
+        assert template == "employees in <str> earning over <num>"
+        assert params == [("str", "Sales"), ("num", "50000")]
+    
+    def test_canonicalize_leaves_identifier_digits(self):
+        """Test digits inside identifiers are not treated as literals."""
+        template, params = _canonicalize("rows in table2 over 5")
+        
+        assert template == "rows in table2 over <num>"
+        assert params == [("num", "5")]
+    
+    def test_rematerialize_substitutes_literals(self):
+        """Test the cached SQL gets the new query's number and string."""
+        result = {"sql": "SELECT * FROM employees WHERE department = 'Sales' AND salary > 50000"}
+        
+        sql = _rematerialize(result, [("str", "Sales"), ("num", "50000")], [("str", "Marketing"), ("num", "60000")])
+        
+        assert sql == "SELECT * FROM employees WHERE department = 'Marketing' AND salary > 60000"
+    
+    def test_rematerialize_escapes_embedded_quotes(self):
+        """Test a substituted string with a quote is escaped as ''."""
+        result = {"sql": "SELECT * FROM employees WHERE name = 'Smith'"}
+        
+        sql = _rematerialize(result, [("str", "Smith")], [("str", "O'Brien")])
+        
+        assert sql == "SELECT * FROM employees WHERE name = 'O''Brien'"
+    
+    def test_rematerialize_reads_escaped_cached_literal(self):
+        """Test a cached literal stored with '' escaping is matched and replaced."""
+        result = {"sql": "SELECT * FROM employees WHERE name = 'O''Brien'"}
+        
+        sql = _rematerialize(result, [("str", "O'Brien")], [("str", "Smith")])
+        
+        assert sql == "SELECT * FROM employees WHERE name = 'Smith'"
+    
+    def test_rematerialize_rejects_different_kinds(self):
+        """Test a number cannot replace a cached string."""
+        result = {"sql": "SELECT * FROM employees WHERE department = 'Sales'"}
+        
+        assert _rematerialize(result, [("str", "Sales")], [("num", "5")]) is None
+    
+    def test_default_limit_is_not_substituted(self):
+        """Test the LIMIT 1000 added by optimization is kept rather than treated as a literal."""
+        result = {"sql": "SELECT * FROM employees WHERE salary > 50000 LIMIT 1000", "optimized": True}
+        
+        assert _split_default_limit(result) == ("SELECT * FROM employees WHERE salary > 50000", " LIMIT 1000")
+        assert _is_templatable(result, [("num", "50000")])
+        assert _rematerialize(result, [("num", "50000")], [("num", "60000")]) == \
+            "SELECT * FROM employees WHERE salary > 60000 LIMIT 1000"
+    
+    def test_derived_literals_are_not_templatable(self):
+        """Test SQL with a literal the query did not contain is not cached as a template."""
+        result = {"sql": "SELECT * FROM employees WHERE hire_date >= '2023-01-01' AND hire_date < '2024-01-01'"}
+        
+        assert not _is_templatable(result, [("num", "2023")])
+    
+    def test_repeated_literals_are_not_templatable(self):
+        """Test a query repeating a literal is not cached as a template."""
+        result = {"sql": "SELECT * FROM employees WHERE salary > 5 AND id > 5"}
+        
+        assert not _is_templatable(result, [("num", "5"), ("num", "5")])
+    
+    def test_new_literals_reuse_template(self, sql_generator):
+        """Test a query differing only in its literals reuses the cached SQL."""
+        generate(sql_generator, "employees in department 'Sales'", "SELECT * FROM employees WHERE department = 'Sales'")
+        
+        result, called = generate(sql_generator, "employees in department 'Marketing'", "SELECT 1")
+        
+        assert not called
+        assert result["sql"].startswith("SELECT * FROM employees WHERE department = 'Marketing'")
+    
+    def test_unsafe_substitution_is_rejected(self, sql_generator):
+        """Test a substituted literal that fails the security checks is not served."""
+        generate(sql_generator, "employees in department 'Sales'", "SELECT * FROM employees WHERE department = 'Sales'")
+        
+        result, called = generate(sql_generator, "employees in department 'x -- DROP TABLE employees'", "SELECT 1")
+        
+        assert called
+        assert "DROP" not in result["sql"]
+
+class TestJsonRecovery:
+    """Test cases for recovering the JSON object from Mistral responses."""
+    
+    def test_well_formed_response(self, sql_generator):
+        """Test a plain JSON response is parsed as is."""
+        result = sql_generator._extract_json_object('{"sql": "SELECT 1", "confidence": 0.9}')
+        
+        assert result == {"sql": "SELECT 1", "confidence": 0.9}
+    
+    def test_surrounding_text(self, sql_generator):
+        """Test prose around the object is ignored."""
+        result = sql_generator._extract_json_object('Here you go:\n{"sql": "SELECT 1"}\nHope this helps.')
+        
+        assert result == {"sql": "SELECT 1"}
+    
+    def test_trailing_commas(self, sql_generator):
+        """Test trailing commas in objects and arrays are dropped."""
+        result = sql_generator._extract_json_object('{"sql": "SELECT 1", "tables_used": ["employees",],}')
+        
+        assert result == {"sql": "SELECT 1", "tables_used": ["employees"]}
+    
+    def test_truncated_string_and_brackets(self, sql_generator):
+        """Test an unterminated string and open brackets are closed."""
+        result = sql_generator._extract_json_object('{"sql": "SELECT 1", "tables_used": ["employees", "depart')
+        
+        assert result == {"sql": "SELECT 1", "tables_used": ["employees", "depart"]}
+    
+    def test_trailing_braced_text(self, sql_generator):
+        """Test text after the object containing braces does not hide the object."""
+        result = sql_generator._extract_json_object('{"sql": "SELECT 1"} Note: use {table} placeholders.')
+        
+        assert result == {"sql": "SELECT 1"}
+    
+    def test_no_object(self, sql_generator):
+        """Test a response without an object gives None."""
+        assert sql_generator._extract_json_object("SELECT 1") is None
+    
+    def test_repair_json_keeps_escaped_quotes(self):
+        """Test an escaped quote does not end the string being repaired."""
+        assert _repair_json('{"sql": "SELECT \\"a') == '{"sql": "SELECT \\"a"}'
+
+class TestFallbackCaching:
+    """Test cases for keeping stand-in results out of the caches."""
+    
+    def test_fallback_not_served_after_mistral_recovers(self, sql_generator):
+        """Test SQL generated while Mistral failed is not reused once it answers again."""
+        sql_generator.mistral_client = Mock()
+        sql_generator.mistral_client.generate_response.side_effect = [
+            {"success": False, "error": "rate limited"},
+            {"success": True, "content": '{"sql": "SELECT * FROM employees WHERE salary > 50000", "confidence": 0.9}'},
+        ]
+        query = "Employees earning over 50000"
+        
+        fallback = sql_generator.generate_sql(query, SCHEMA_INFO)
+        recovered = sql_generator.generate_sql(query, SCHEMA_INFO)
+        
+        assert fallback["fallback"]
+        assert sql_generator.mistral_client.generate_response.call_count == 2
+        assert recovered["sql"].startswith("SELECT * FROM employees WHERE salary > 50000")
+        assert not recovered.get("fallback")
+    
+    def test_fallback_not_cached(self, sql_generator):
+        """Test a fallback result is written to none of the caches."""
+        with patch.object(sql_generator, '_generate_sql_with_mistral') as mock_mistral:
+            mock_mistral.return_value = sql_generator._fallback_sql_generation("Employees earning over 50000", SCHEMA_INFO)
+            sql_generator.generate_sql("Employees earning over 50000", SCHEMA_INFO)
+        
+        assert sql_generator.redis_service.store == {}
+        assert len(sql_generator._semantic_cache) == 0
+
+class TestCacheVersioning:
+    """Test cases for tying cached SQL to the schema it was generated for."""
+    
+    def test_schema_refresh_without_schema_info_misses(self, sql_generator):
+        """Test a rediscovered schema invalidates SQL cached for callers passing no schema."""
+        sql_generator.schema_service = Mock()
+        sql_generator.schema_service.get_schema_info.return_value = SCHEMA_INFO
+        sql_generator.schema_service.get_schema_version.side_effect = ["2024-01-01T00:00:00", "2024-02-01T00:00:00"]
+        
+        with patch('api.services.sql_generator.get_database_manager') as mock_manager, \
+             patch.object(sql_generator, '_generate_sql_with_mistral') as mock_mistral:
+            mock_manager.return_value.database_url = "sqlite:///test.db"
+            mock_mistral.return_value = {"sql": "SELECT COUNT(*) FROM employees", "confidence": 0.9, "reasoning": "generated"}
+            
+            sql_generator.generate_sql("How many employees do we have?")
+            sql_generator.generate_sql("How many employees do we have?")
+        
+        assert mock_mistral.call_count == 2
+        sql_generator.schema_service.get_schema_version.assert_called_with("sqlite:///test.db")